@@ -21,6 +21,27 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# 마이그레이션에서 SQL 로 직접 만들어서 모델에는 없는 검색용 객체 (autogenerate 가 지우지 않도록 비교에서 제외)
+# - sqlite: FTS5 가상 테이블 posts_fts 와 그 shadow 테이블 (posts_fts_data, posts_fts_idx, ...)
+# - postgresql: posts.search_vector 컬럼과 GIN 인덱스
+SEARCH_INDEXES = {
+    "ix_posts_search_vector",
+    "ix_posts_title_trgm",
+    "ix_posts_content_trgm",
+    "ix_books_title_trgm",
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and name.startswith("posts_fts"):
+        return False
+    if type_ == "column" and name == "search_vector" and object.table.name == "posts":
+        return False
+    if type_ == "index" and name in SEARCH_INDEXES:
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -44,6 +65,7 @@ def run_migrations_offline() -> None:
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_object=include_object,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -66,7 +88,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
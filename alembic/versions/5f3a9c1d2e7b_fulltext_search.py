@@ -0,0 +1,103 @@
+"""Full text search
+
+Revision ID: 5f3a9c1d2e7b
+Revises: cbe18a71adfa
+Create Date: 2026-10-18 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3a9c1d2e7b'
+down_revision: Union[str, None] = 'cbe18a71adfa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    # 책 제목/ISBN 으로 찾은 게시글을 가져올 때 사용
+    op.create_index('ix_posts_isbn', 'posts', ['isbn'])
+
+    if dialect == 'postgresql':
+        # 단어 검색: tsvector + GIN, 한국어 부분 일치: pg_trgm + GIN
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.add_column('posts', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute("""
+            CREATE FUNCTION posts_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+                    setweight(to_tsvector('simple', coalesce(NEW.content, '')), 'B');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute("""
+            CREATE TRIGGER posts_search_vector_trigger
+            BEFORE INSERT OR UPDATE OF title, content ON posts
+            FOR EACH ROW EXECUTE FUNCTION posts_search_vector_update()
+        """)
+        op.execute("""
+            UPDATE posts SET search_vector =
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(content, '')), 'B')
+        """)
+        op.execute("CREATE INDEX ix_posts_search_vector ON posts USING GIN (search_vector)")
+        op.execute("CREATE INDEX ix_posts_title_trgm ON posts USING GIN (title gin_trgm_ops)")
+        op.execute("CREATE INDEX ix_posts_content_trgm ON posts USING GIN (content gin_trgm_ops)")
+        op.execute("CREATE INDEX ix_books_title_trgm ON books USING GIN (title gin_trgm_ops)")
+
+    elif dialect == 'sqlite':
+        # FTS5 trigram 토크나이저: 3글자 이상 부분 일치(한국어 포함)를 인덱스로 검색
+        op.execute("""
+            CREATE VIRTUAL TABLE posts_fts USING fts5(
+                title, content, content='posts', content_rowid='id', tokenize='trigram'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER posts_fts_insert AFTER INSERT ON posts BEGIN
+                INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER posts_fts_delete AFTER DELETE ON posts BEGIN
+                INSERT INTO posts_fts(posts_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER posts_fts_update AFTER UPDATE OF title, content ON posts BEGIN
+                INSERT INTO posts_fts(posts_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+                INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+            END
+        """)
+        op.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_books_title_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_posts_content_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_posts_title_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_posts_search_vector")
+        op.execute("DROP TRIGGER IF EXISTS posts_search_vector_trigger ON posts")
+        op.execute("DROP FUNCTION IF EXISTS posts_search_vector_update()")
+        op.drop_column('posts', 'search_vector')
+
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS posts_fts_update")
+        op.execute("DROP TRIGGER IF EXISTS posts_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS posts_fts_insert")
+        op.execute("DROP TABLE IF EXISTS posts_fts")
+
+    op.drop_index('ix_posts_isbn', table_name='posts')
@@ -0,0 +1,57 @@
+"""Secondary indexes
+
+Revision ID: 8d2e4b6a1c3f
+Revises: 5f3a9c1d2e7b
+Create Date: 2026-10-18 14:03:27.512930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4b6a1c3f'
+down_revision: Union[str, None] = '5f3a9c1d2e7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (인덱스 이름, 테이블, 컬럼) - 라우터의 조회 조건/정렬 순서에 맞춘 복합 인덱스
+# usertagpreferences 는 PK (user_id, tag_id) 가 이미 user_id 로 시작해서 따로 만들지 않음
+INDEXES = [
+    # 댓글 목록: WHERE post_id = ? ORDER BY created_at
+    ('ix_comments_post_id_created_at', 'comments', ['post_id', 'created_at']),
+    # 대댓글 삭제 시 CASCADE 로 parent_id 를 찾음
+    ('ix_comments_parent_id', 'comments', ['parent_id']),
+    # 좋아요한 게시글: WHERE user_id = ? ORDER BY created_at DESC, post_id DESC
+    ('ix_likes_user_id_created_at', 'likes', ['user_id', 'created_at', 'post_id']),
+    # 게시글의 좋아요 목록 (PK 는 user_id 로 시작해서 post_id 조회에 못 씀)
+    ('ix_likes_post_id', 'likes', ['post_id']),
+    # 사용자별 게시글
+    ('ix_posts_user_id_created_at', 'posts', ['user_id', 'created_at']),
+    # 인기 게시글: ORDER BY like_count DESC, id DESC
+    ('ix_posts_like_count_id', 'posts', ['like_count', 'id']),
+    # 검색 기본 정렬: ORDER BY created_at DESC, id DESC
+    ('ix_posts_created_at_id', 'posts', ['created_at', 'id']),
+    # 팔로워 목록: WHERE following_id = ?
+    ('ix_follows_following_id', 'follows', ['following_id', 'follower_id']),
+    # 태그로 게시글 찾기 (관련 게시글, 추천, 태그 검색)
+    ('ix_posttags_tag_id', 'posttags', ['tag_id', 'post_id']),
+]
+
+
+def upgrade() -> None:
+    # postgresql 에서는 CONCURRENTLY 로 만들어서 운영 중에도 테이블 쓰기를 막지 않음
+    # (CONCURRENTLY 는 트랜잭션 안에서 실행할 수 없어서 autocommit 블록 사용)
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, if_not_exists=True, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,31 @@
+"""Post tag status
+
+Revision ID: b7c1e9f04a2d
+Revises: 8d2e4b6a1c3f
+Create Date: 2026-10-18 17:41:09.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1e9f04a2d'
+down_revision: Union[str, None] = '8d2e4b6a1c3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # AI 태그 생성 상태 (기존 게시글은 이미 태그가 붙어 있으므로 done)
+    op.add_column(
+        'posts',
+        sa.Column('tag_status', sa.VARCHAR(length=20), nullable=True, server_default='done'),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.drop_column('tag_status')
@@ -0,0 +1,32 @@
+"""Scheduler fencing tokens
+
+Revision ID: e3a8d5f27c14
+Revises: b7c1e9f04a2d
+Create Date: 2026-10-18 21:12:43.518207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a8d5f27c14'
+down_revision: Union[str, None] = 'b7c1e9f04a2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 스케줄러 리더가 DB에 반영할 때 쓰는 펜싱 토큰 (임대가 끊긴 이전 리더의 늦은 커밋을 거부)
+    op.create_table(
+        'scheduler_fences',
+        sa.Column('name', sa.VARCHAR(length=50), nullable=False),
+        sa.Column('token', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduler_fences')
@@ -1,6 +1,6 @@
 import os
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 class Settings(BaseSettings):
     # 기본 설정
@@ -13,6 +13,93 @@ class Settings(BaseSettings):
 
     # 데이터베이스 입력
     database_url: str
+
+    # 커넥션 풀 설정 (워커 1개 기준)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # 요청 하나가 동시에 잡을 수 있는 커넥션 수 (strict면 초과 시 예외, 아니면 로그만)
+    db_max_connections_per_request: int = 1
+    db_session_scope_strict: bool = False
+
+    # 조회수 중복 제거 방식: key(정확, 메모리 많이 사용) / hll (게시글·일자별 근사, tests/test_view_dedup.py 참고)
+    view_dedup_backend: Literal["key", "hll"] = "key"
+
+    # User.total_views 전체 재계산 주기 (0이면 끔, 평소에는 조회수 동기화 때 증가분으로 갱신)
+    user_total_views_reconcile_hours: int = 0
+
+    # 스케줄러 리더 임대 시간(초), 임대 갱신은 1/3 주기로 실행
+    scheduler_leader_lease_seconds: int = 30
+
+    # 검색 방식: fulltext(전문 검색 인덱스, 마이그레이션 필요) / ilike(기존 LIKE 검색)
+    search_backend: Literal["fulltext", "ilike"] = "fulltext"
+
+    # 인증 사용자 캐시 (프로세스 LRU -> Redis -> DB)
+    user_cache_size: int = 1024
+    user_cache_local_ttl: int = 10
+    user_cache_ttl: int = 60
+
+    # 요청당 SQL 문 수 카운터 (N+1 회귀 감지용, 기본 꺼짐)
+    sql_statement_counter: bool = False
+    sql_statement_warn_threshold: int = 10
+
+    # 인기 게시글 리더보드 (Redis ZSET)
+    # 점수 = 좋아요 수 + popular_view_weight * 조회수, 반감기(시간)를 주면 시간 감쇠 적용 (0이면 끔)
+    popular_view_weight: float = 0.0
+    popular_decay_half_life_hours: float = 0.0
+    popular_rebuild_minutes: int = 30
+
+    # 사용자별 추천 후보 목록 (Redis ZSET) 최대 개수 / 유지 시간(초)
+    recommend_candidates_size: int = 500
+    recommend_cache_ttl: int = 86400
+
+    # 관련 게시글: index(워커 메모리의 태그 벡터 인덱스) / sql(posttags GROUP BY)
+    related_posts_backend: Literal["index", "sql"] = "index"
+    related_posts_metric: Literal["cosine", "jaccard"] = "cosine"
+    related_index_refresh_seconds: int = 60
+    related_index_rebuild_minutes: int = 60
+
+    # 좋아요 write-behind: 켜면 토글은 Redis 에만 기록하고 스케줄러가 like_flush_seconds 마다 DB에 반영
+    like_write_behind: bool = False
+    like_flush_seconds: int = 10
+
+    # AI 태그 생성 워커 (Redis 큐)
+    tagging_worker_concurrency: int = 2
+    tagging_max_attempts: int = 3
+    tagging_retry_base_seconds: int = 5
+    tagging_job_timeout: int = 120
+    tagging_poll_seconds: float = 1.0
+    # 이 시간(분) 넘게 pending 인데 큐에 없는 게시글은 리더가 다시 등록
+    tagging_requeue_minutes: int = 10
+
+    # AI 태그 생성 LLM HTTP 클라이언트 (keep-alive 커넥션 풀, 동시 호출 제한, 서킷 브레이커)
+    llm_timeout: float = 60.0
+    llm_connect_timeout: float = 5.0
+    llm_keepalive_expiry: float = 30.0
+    llm_max_concurrency: int = 4
+    llm_breaker_failures: int = 5
+    llm_breaker_cooldown_seconds: int = 30
+
+    # AI 태그 생성 결과 캐시 (isbn, 본문, 태그 목록 버전의 해시 -> 태그, Redis)
+    tag_result_cache_enabled: bool = True
+    tag_result_cache_ttl: int = 604800
+
+    # 로컬 태그 분류기 (PostTag 로 학습): off / primary(LLM 대신) / prefilter(프롬프트 후보 축소) / fallback(LLM 장애 시)
+    local_tagger_mode: Literal["off", "primary", "prefilter", "fallback"] = "fallback"
+    # 가중치 행렬은 태그 수 x 2^bits x 4바이트 (워커마다): 태그 50개, 16비트면 평소 약 13MB,
+    # 학습 중 정확도 측정(_normalize(sums.copy()))에는 복사본까지 약 26MB. 1비트 늘릴 때마다 두 배
+    local_tagger_feature_bits: int = 16
+    local_tagger_min_posts: int = 50
+    local_tagger_max_posts: int = 50000
+    local_tagger_prefilter_size: int = 10
+    # 1등 태그의 코사인 점수가 이 값 이하면 (학습한 글과 겹치는 n-gram 이 거의 없으면) 태그하지 않고 LLM 에 맡김
+    local_tagger_min_score: float = 0.05
+    local_tagger_retrain_minutes: int = 60
+
+    # 태그 목록 프로세스 캐시 (Redis pub/sub 로 무효화, 알림을 놓쳤을 때를 대비해 이 시간(초)이 지나면 다시 읽음)
+    tag_catalog_ttl: int = 3600
     
     #jwt
     jwt_secret : str = ''
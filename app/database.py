@@ -1,19 +1,206 @@
-from sqlalchemy import create_engine
+import logging
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.pool_metrics import InstrumentedAsyncQueuePool, pool_metrics
 
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(bind=engine)
+logger = logging.getLogger(__name__)
+
+# 동기 드라이버 -> 비동기 드라이버 매핑
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    '''
+    DATABASE_URL의 드라이버를 비동기 드라이버로 바꿔서 반환
+    (이미 비동기 드라이버면 그대로 반환)
+    '''
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    async_driver = ASYNC_DRIVERS.get(backend)
+    if async_driver and url.drivername != async_driver:
+        url = url.set(drivername=async_driver)
+    return url.render_as_string(hide_password=False)
+
+
+def async_engine_options(database_url: str) -> dict:
+    '''
+    비동기 엔진 커넥션 풀 옵션
+    (sqlite 메모리 DB는 풀을 쓰지 않으므로 옵션 없음)
+    '''
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+async_engine = create_async_engine(
+    to_async_url(settings.database_url), **async_engine_options(settings.database_url)
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
+)
 Base =declarative_base()
 
-def get_db():
-    db = SessionLocal()
+
+class SessionScope:
+    '''
+    요청(또는 백그라운드 작업) 하나가 공유하는 세션 단위
+    - security, 라우터, 작업 코드가 get_async_db / session_scope 로 같은 세션을 받습니다.
+    - 커넥션 체크아웃 수를 세서 한 단위가 커넥션을 여러 개 잡으면 기록합니다.
+    '''
+    def __init__(self, name: str):
+        self.name = name
+        self.session: Optional[AsyncSession] = None
+        self.checkouts = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self.statements = 0
+
+    def on_checkout(self):
+        self.checkouts += 1
+        self.in_use += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def on_checkin(self):
+        self.in_use -= 1
+
+    def check(self):
+        limit = settings.db_max_connections_per_request
+        if self.max_in_use <= limit:
+            return
+        pool_metrics.record_scope_violation()
+        message = (
+            f"{self.name}: 커넥션을 동시에 {self.max_in_use}개 사용했습니다 (최대 {limit}개)"
+        )
+        if settings.db_session_scope_strict:
+            raise RuntimeError(message)
+        logger.error(message)
+
+
+_current_scope: ContextVar[Optional[SessionScope]] = ContextVar(
+    "db_session_scope", default=None
+)
+
+
+def current_scope() -> Optional[SessionScope]:
+    return _current_scope.get()
+
+
+@event.listens_for(async_engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.on_checkout()
+        connection_record.info["session_scope"] = scope
+
+
+@event.listens_for(async_engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    scope = connection_record.info.pop("session_scope", None)
+    if scope is not None:
+        scope.on_checkin()
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _on_execute(conn, cursor, statement, parameters, context, executemany):
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.statements += 1
+
+
+@asynccontextmanager
+async def session_scope(name: str = "background"):
+    '''
+    현재 단위의 세션을 반환 (없으면 새로 만들고 끝날 때 닫음)
+    스케줄러 같은 백그라운드 작업은 이걸로 자기 단위를 엽니다.
+    '''
+    scope = _current_scope.get()
+    if scope is not None and scope.session is not None:
+        yield scope.session
+        return
+
+    token = None
+    if scope is None:
+        scope = SessionScope(name)
+        token = _current_scope.set(scope)
     try:
-        yield db
+        async with AsyncSessionLocal() as db:
+            scope.session = db
+            try:
+                yield db
+            finally:
+                scope.session = None
     finally:
-        db.close()
-        
+        if token is not None:
+            _current_scope.reset(token)
+            scope.check()
+
+
+async def get_async_db():
+    async with session_scope("request") as db:
+        yield db
+
+
+SQL_STATEMENTS_HEADER = "X-SQL-Statements"
+
+
+class SessionScopeMiddleware:
+    '''
+    HTTP 요청마다 SessionScope를 열고, 끝날 때 커넥션 사용량을 검사하는 ASGI 미들웨어
+    sql_statement_counter 가 켜져 있으면 요청이 실행한 SQL 문 수를 응답 헤더로 내려주고
+    기준치를 넘으면 경고 로그를 남깁니다. (N+1 쿼리 감지용)
+    '''
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_scope = SessionScope(f"{scope['method']} {scope['path']}")
+        token = _current_scope.set(request_scope)
+
+        async def send_with_count(message):
+            # 응답 헤더를 보내는 시점이면 라우터의 쿼리는 모두 끝난 상태
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (SQL_STATEMENTS_HEADER.lower().encode(), str(request_scope.statements).encode())
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(
+                scope, receive, send_with_count if settings.sql_statement_counter else send
+            )
+        finally:
+            _current_scope.reset(token)
+            request_scope.check()
+            if (
+                settings.sql_statement_counter
+                and request_scope.statements > settings.sql_statement_warn_threshold
+            ):
+                logger.warning(
+                    f"{request_scope.name}: SQL 문을 {request_scope.statements}개 실행했습니다 "
+                    f"(기준 {settings.sql_statement_warn_threshold}개)"
+                )
 
-def create_table():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
@@ -0,0 +1,155 @@
+import logging
+import os
+import socket
+import uuid
+from functools import wraps
+from typing import Optional
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import SchedulerFence
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# 리더가 없으면 리더가 되고(펜싱 토큰 발급), 이미 리더면 임대 기간 연장
+# 반환값: 리더면 펜싱 토큰, 아니면 0
+ACQUIRE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return tonumber(redis.call('GET', KEYS[2]) or '0')
+end
+if not owner then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return redis.call('INCR', KEYS[2])
+end
+return 0
+"""
+
+# 아직 같은 토큰으로 리더인지 확인
+CHECK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] and redis.call('GET', KEYS[2]) == ARGV[2] then
+    return 1
+end
+return 0
+"""
+
+# 자신이 리더일 때만 리더 키 삭제
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElection:
+    '''
+    Redis 임대(lease) 기반 리더 선출
+    - 여러 워커/레플리카 중 리더 하나만 스케줄러 작업을 실행합니다.
+    - 리더가 될 때마다 펜싱 토큰이 1씩 증가하므로, 임대가 끊긴 뒤 늦게 끝나는 작업은
+      still_leader() 로 자신의 토큰이 여전히 유효한지 확인하고 결과를 버립니다.
+    - Redis 확인과 커밋 사이에 리더가 바뀔 수 있으므로, DB에 반영하는 작업은 fence(db) 로
+      같은 트랜잭션 안에서 토큰을 DB에도 기록해서 더 높은 토큰이 이미 반영됐으면 커밋하지 않습니다.
+    '''
+    def __init__(self, name: str, lease_seconds: int):
+        self.key = f"scheduler:{name}:leader"
+        self.fence_key = f"scheduler:{name}:fence"
+        self.lease_ms = lease_seconds * 1000
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.token: Optional[int] = None
+        self._scripts = {}
+
+    def _script(self, source: str):
+        if source not in self._scripts:
+            self._scripts[source] = redis_client.redis.register_script(source)
+        return self._scripts[source]
+
+    @property
+    def is_leader(self) -> bool:
+        return self.token is not None
+
+    async def acquire_or_renew(self) -> bool:
+        try:
+            token = await self._script(ACQUIRE_SCRIPT)(
+                keys=[self.key, self.fence_key], args=[self.worker_id, self.lease_ms]
+            )
+        except Exception as e:
+            logger.error(f"리더 임대 갱신 오류: {e}")
+            token = 0
+
+        token = int(token) or None
+        if token != self.token:
+            if token:
+                logger.info(f"스케줄러 리더가 되었습니다 (토큰 {token})")
+            else:
+                logger.info("스케줄러 리더를 잃었습니다")
+        self.token = token
+        return self.is_leader
+
+    async def still_leader(self) -> bool:
+        '''
+        작업 결과를 반영하기 직전에 호출 (펜싱)
+        '''
+        if self.token is None:
+            return False
+        try:
+            result = await self._script(CHECK_SCRIPT)(
+                keys=[self.key, self.fence_key], args=[self.worker_id, self.token]
+            )
+        except Exception as e:
+            logger.error(f"리더 확인 오류: {e}")
+            result = 0
+        if not result:
+            self.token = None
+        return bool(result)
+
+    async def fence(self, db) -> bool:
+        '''
+        DB 커밋 직전에 같은 트랜잭션에서 호출 (펜싱)
+        scheduler_fences 의 토큰이 자신의 토큰보다 크지 않을 때만 자신의 토큰으로 바꾸고 True
+        (postgresql 은 커밋할 때까지 행 잠금을 잡으므로 다른 리더의 반영과 순서가 정해짐)
+        '''
+        if not await self.still_leader():
+            return False
+        token = self.token
+        insert = postgresql_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+        statement = insert(SchedulerFence).values(name=self.key, token=token)
+        result = await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[SchedulerFence.name],
+                set_={"token": statement.excluded.token},
+                where=SchedulerFence.token <= statement.excluded.token,
+            )
+        )
+        if result.rowcount:
+            return True
+        logger.warning(f"펜싱 토큰 {token} 보다 높은 토큰이 이미 DB에 반영되었습니다")
+        self.token = None
+        return False
+
+    async def release(self):
+        if self.token is None:
+            return
+        try:
+            await self._script(RELEASE_SCRIPT)(keys=[self.key], args=[self.worker_id])
+        except Exception as e:
+            logger.error(f"리더 반납 오류: {e}")
+        self.token = None
+
+
+def leader_only(election: LeaderElection):
+    '''
+    리더일 때만 작업을 실행하는 데코레이터
+    아직 리더가 아니면 먼저 임대를 시도 (시작 직후 임대 갱신 작업보다 먼저 실행된 경우)
+    '''
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not election.is_leader and not await election.acquire_or_renew():
+                return None
+            if not await election.still_leader():
+                return None
+            return await func(*args, **kwargs)
+        return wrapper
+    return decorator
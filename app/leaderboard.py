@@ -0,0 +1,257 @@
+import logging
+import math
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from app.config import settings
+from app.models import Post as PostModel
+from app.post_loader import select_posts
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# 시간 감쇠 점수의 기준 시각 (점수 = log2(1 + 인기도) + 기준 시각 이후 경과 반감기 수)
+DECAY_EPOCH = datetime(2024, 1, 1)
+
+# 순위를 읽을 때 자기 글을 걸러내고도 페이지를 채우도록 한 번에 더 읽어오는 배수
+READ_CHUNK_FACTOR = 2
+# offset 페이지의 시작 순위를 찾을 때 한 번에 확인하는 순위 수 (자기 글 건너뛰기)
+START_RANK_CHUNK = 500
+
+# 인기 점수 방식 (커서에 같이 넣어서 다른 방식의 점수와 비교하지 않도록 함)
+SCORE_MODE_RAW = "raw"
+SCORE_MODE_DECAY = "decay"
+
+# 리더보드를 다 만든 뒤에만 점수를 갱신 (빈 키에 ZADD 하면 새 글만 있는 리더보드가 되므로)
+# KEYS = [리더보드, 준비 표시 키], ARGV = [점수, 멤버, 점수, 멤버, ...]
+UPDATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('ZADD', KEYS[1], unpack(ARGV))
+    return 1
+end
+return 0
+"""
+
+
+def popular_score_mode() -> str:
+    '''
+    리더보드(Redis) 점수 방식 - DB 정렬은 항상 SCORE_MODE_RAW
+    '''
+    return SCORE_MODE_DECAY if settings.popular_decay_half_life_hours > 0 else SCORE_MODE_RAW
+
+
+def popular_score(like_count: Optional[int], views: Optional[int], created_at: Optional[datetime]) -> float:
+    '''
+    인기 점수
+    - 기본: 좋아요 수 + popular_view_weight * 조회수
+    - popular_decay_half_life_hours > 0: 반감기마다 인기도가 절반이 되는 시간 감쇠 점수
+      (글이 늦게 쓰일수록 점수가 커지는 방식이라 시간이 지나도 점수를 다시 계산할 필요 없음)
+    '''
+    raw = (like_count or 0) + settings.popular_view_weight * (views or 0)
+    half_life = settings.popular_decay_half_life_hours
+    if half_life <= 0:
+        return float(raw)
+    hours = ((created_at or DECAY_EPOCH) - DECAY_EPOCH).total_seconds() / 3600
+    return math.log2(1 + max(raw, 0)) + hours / half_life
+
+
+class PostRanking:
+    '''
+    게시글 id 를 점수 순으로 담은 Redis ZSET
+    - 멤버는 0으로 채운 게시글 id 라서 점수가 같으면 id 내림차순으로 순서가 고정됩니다.
+    - 읽을 때 게시글은 DB 에서 PK 로 한 번에 불러오고, 지워진 게시글은 ZSET 에서 정리합니다.
+    '''
+    def __init__(self, key: str):
+        self.key = key
+
+    @staticmethod
+    def member(post_id: int) -> str:
+        return f"{post_id:012d}"
+
+    async def remove(self, *post_ids: int):
+        if not post_ids:
+            return
+        try:
+            await redis_client.redis.zrem(self.key, *(self.member(post_id) for post_id in post_ids))
+        except Exception as e:
+            logger.error(f"게시글 순위 삭제 오류: {e}")
+
+    async def _start_rank(self, db, offset: int, exclude_user_id: Optional[int]) -> int:
+        '''
+        자기 글을 뺀 순서에서 offset 번째 글의 ZSET 순위
+        앞에서부터 START_RANK_CHUNK 개씩 읽으며 자기 글만 DB 에서 확인해서 건너뜀
+        (자기 글 전체를 불러오지 않고, 확인하는 양은 offset 에 비례)
+        '''
+        if exclude_user_id is None or offset == 0:
+            return offset
+        rank = 0
+        remaining = offset
+        while True:
+            members = await redis_client.redis.zrevrange(
+                self.key, rank, rank + START_RANK_CHUNK - 1
+            )
+            if not members:
+                return rank
+            post_ids = [int(member) for member in members]
+            result = await db.execute(
+                select(PostModel.id).where(
+                    PostModel.id.in_(post_ids), PostModel.user_id == exclude_user_id
+                )
+            )
+            own_ids = set(result.scalars().all())
+            for i, post_id in enumerate(post_ids):
+                if post_id in own_ids:
+                    continue
+                if remaining == 0:
+                    return rank + i
+                remaining -= 1
+            rank += len(post_ids)
+
+    async def _cursor_rank(self, score: float, post_id: int) -> int:
+        '''
+        커서 (점수, 게시글 id) 바로 다음 순위
+        커서의 게시글 점수가 그대로면 그 순위 + 1, 그 사이 점수가 바뀌었거나 삭제됐으면
+        커서보다 앞서는 (점수가 크거나, 같은 점수에서 id 가 큰) 멤버 수
+        '''
+        member = self.member(post_id)
+        async with redis_client.redis.pipeline(transaction=False) as pipe:
+            pipe.zscore(self.key, member)
+            pipe.zrevrank(self.key, member)
+            current_score, rank = await pipe.execute()
+        if current_score is not None and rank is not None and current_score == score:
+            return rank + 1
+        async with redis_client.redis.pipeline(transaction=False) as pipe:
+            pipe.zcount(self.key, f"({score!r}", "+inf")
+            pipe.zrangebyscore(self.key, score, score)
+            higher, ties = await pipe.execute()
+        return higher + sum(1 for tie in ties if tie > member)
+
+    async def read(
+        self,
+        db,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[float, int]] = None,
+        exclude_user_id: Optional[int] = None,
+    ) -> Optional[List[Tuple[PostModel, float]]]:
+        '''
+        점수 순서대로 (게시글, 점수) 목록 반환
+        - after: 커서 (점수, 게시글 id), 없으면 offset 부터
+        - exclude_user_id: 이 사용자의 글은 건너뜀
+        Redis 를 쓸 수 없으면 None
+        '''
+        try:
+            if after is not None:
+                start = await self._cursor_rank(*after)
+            else:
+                start = await self._start_rank(db, offset, exclude_user_id)
+
+            page: List[Tuple[PostModel, float]] = []
+            chunk = max(limit * READ_CHUNK_FACTOR, 1)
+            while len(page) < limit:
+                entries = await redis_client.redis.zrevrange(
+                    self.key, start, start + chunk - 1, withscores=True
+                )
+                if not entries:
+                    break
+                start += len(entries)
+                post_ids = [int(member) for member, _ in entries]
+                result = await db.execute(select_posts().where(PostModel.id.in_(post_ids)))
+                posts = {post.id: post for post in result.scalars().all()}
+
+                stale = [post_id for post_id in post_ids if post_id not in posts]
+                if stale:
+                    # 회원 탈퇴 등으로 지워진 게시글은 읽으면서 정리
+                    await self.remove(*stale)
+                    start -= len(stale)
+
+                for post_id, (_, score) in zip(post_ids, entries):
+                    post = posts.get(post_id)
+                    if post is None or (exclude_user_id is not None and post.user_id == exclude_user_id):
+                        continue
+                    page.append((post, score))
+                    if len(page) >= limit:
+                        break
+            return page
+        except Exception as e:
+            logger.error(f"게시글 순위 조회 오류: {e}")
+            return None
+
+
+class PopularLeaderboard(PostRanking):
+    '''
+    인기 게시글 리더보드
+    - rebuild() 로 DB 의 모든 게시글을 넣은 뒤 준비 표시 키를 세우고, 그 뒤로는
+      좋아요/좋아요 취소, 게시글 작성/삭제, 조회수 동기화 때 점수를 갱신합니다.
+    - 준비 표시 키가 없으면(시작 직후, Redis 가 비워진 뒤) 점수 갱신은 하지 않고
+      None 을 돌려줘서 호출한 쪽이 DB 로 조회합니다. Redis 를 쓸 수 없을 때도 마찬가지입니다.
+    '''
+    def __init__(self, key: str = "posts:popular"):
+        super().__init__(key)
+        self.ready_key = f"{key}:ready"
+        self._update_script = None
+
+    async def update(self, post: PostModel):
+        await self.update_many([(post.id, post.like_count, post.views, post.created_at)])
+
+    async def update_many(self, rows: Iterable[Tuple[int, int, int, datetime]]):
+        '''
+        (post_id, like_count, views, created_at) 목록으로 점수 갱신 (리더보드가 준비됐을 때만)
+        '''
+        args = []
+        for post_id, like_count, views, created_at in rows:
+            args += [popular_score(like_count, views, created_at), self.member(post_id)]
+        if not args:
+            return
+        try:
+            script = self._update_script
+            if script is None or script.registered_client is not redis_client.redis:
+                # 다시 연결한 클라이언트에 등록
+                self._update_script = redis_client.redis.register_script(UPDATE_SCRIPT)
+            await self._update_script(keys=[self.key, self.ready_key], args=args)
+        except Exception as e:
+            logger.error(f"인기 게시글 점수 갱신 오류: {e}")
+
+    async def rebuild(self, db, batch_size: int = 1000):
+        '''
+        DB 기준으로 리더보드 전체를 다시 만듦 (임시 키에 채운 뒤 RENAME 으로 교체하고 준비 표시)
+        '''
+        tmp_key = f"{self.key}:rebuild"
+        total = 0
+        try:
+            await redis_client.redis.delete(tmp_key)
+            result = await db.stream(
+                select(PostModel.id, PostModel.like_count, PostModel.views, PostModel.created_at)
+            )
+            async for rows in result.partitions(batch_size):
+                await redis_client.redis.zadd(
+                    tmp_key,
+                    {
+                        self.member(post_id): popular_score(like_count, views, created_at)
+                        for post_id, like_count, views, created_at in rows
+                    },
+                )
+                total += len(rows)
+            async with redis_client.redis.pipeline(transaction=True) as pipe:
+                if total:
+                    pipe.rename(tmp_key, self.key)
+                else:
+                    pipe.delete(self.key)
+                pipe.set(self.ready_key, 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"인기 게시글 리더보드 재생성 오류: {e}")
+            return
+        logger.info(f"인기 게시글 리더보드 재생성: 게시글 {total}개")
+
+    async def read(self, db, limit: int, **kwargs) -> Optional[List[Tuple[PostModel, float]]]:
+        try:
+            if not await redis_client.redis.exists(self.ready_key):
+                return None
+        except Exception as e:
+            logger.error(f"인기 게시글 리더보드 조회 오류: {e}")
+            return None
+        return await super().read(db, limit, **kwargs)
+
+
+popular_leaderboard = PopularLeaderboard()
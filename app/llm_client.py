@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+import httpx
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 서킷 브레이커 상태
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    '''
+    LLM 엔드포인트가 비정상이라 호출하지 않고 바로 실패 (retry_after 초 뒤에 다시 시도 가능)
+    '''
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM 서킷 브레이커 열림, {retry_after:.1f}초 뒤 재시도")
+        self.retry_after = retry_after
+
+
+class LLMClient:
+    '''
+    태그 생성 LLM 호출용 공유 HTTP 클라이언트
+    - lifespan 에서 만든 httpx.AsyncClient 하나를 keep-alive 커넥션 풀로 재사용합니다.
+    - 동시 호출 수는 llm_max_concurrency 로 제한하고, 넘으면 세마포어에서 기다립니다.
+    - 연속 llm_breaker_failures 번 실패하면 llm_breaker_cooldown_seconds 동안 호출하지 않고
+      CircuitOpenError 를 냅니다. 쿨다운이 지나면 한 번만 시험 호출해서 성공하면 닫습니다.
+    '''
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_wait = 0.0
+
+    async def connect(self):
+        if self.client is not None:
+            return
+        concurrency = settings.llm_max_concurrency
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.llm_timeout, connect=settings.llm_connect_timeout),
+            limits=httpx.Limits(
+                max_connections=concurrency,
+                max_keepalive_connections=concurrency,
+                keepalive_expiry=settings.llm_keepalive_expiry,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(concurrency)
+        logger.info(f"LLM 클라이언트 생성: 동시 호출 {concurrency}개")
+
+    async def disconnect(self):
+        try:
+            if self.client is not None:
+                await self.client.aclose()
+        except Exception as e:
+            logger.error(f"LLM 클라이언트 종료 오류: {e}")
+        self.client = None
+        self._semaphore = None
+
+    def _before_call(self):
+        '''
+        서킷이 열려 있으면 CircuitOpenError, 쿨다운이 지났으면 시험 호출 하나만 통과
+        '''
+        if self.state == CIRCUIT_CLOSED:
+            return
+        remaining = self._opened_at + settings.llm_breaker_cooldown_seconds - time.monotonic()
+        if self.state == CIRCUIT_OPEN and remaining <= 0:
+            self.state = CIRCUIT_HALF_OPEN
+        if self.state == CIRCUIT_HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(max(remaining, 1.0))
+
+    def _record_success(self):
+        if self.state != CIRCUIT_CLOSED:
+            logger.info("LLM 서킷 브레이커 닫힘")
+        self.state = CIRCUIT_CLOSED
+        self._failures = 0
+        self._probing = False
+
+    def _record_failure(self):
+        self._failures += 1
+        if self.state == CIRCUIT_HALF_OPEN or self._failures >= settings.llm_breaker_failures:
+            if self.state != CIRCUIT_OPEN:
+                logger.warning(f"LLM 서킷 브레이커 열림: 연속 실패 {self._failures}회")
+            self.state = CIRCUIT_OPEN
+            self._opened_at = time.monotonic()
+        self._probing = False
+
+    async def post(self, url: str, json) -> httpx.Response:
+        '''
+        POST 요청 후 응답 반환 (2xx 가 아니면 httpx.HTTPStatusError)
+        연결 오류, 타임아웃, 5xx, 429 는 서킷 브레이커 실패로 셉니다.
+        '''
+        if self.client is None:
+            await self.connect()
+        self._before_call()
+
+        wait_start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            self._probing = False
+            raise
+        finally:
+            self.waiting -= 1
+        self.total_wait += time.perf_counter() - wait_start
+
+        self.in_flight += 1
+        self.requests += 1
+        start = time.perf_counter()
+        try:
+            resp = await self.client.post(url, json=json)
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            self.errors += 1
+            code = e.response.status_code
+            if code >= 500 or code == 429:
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        except asyncio.CancelledError:
+            self._probing = False
+            raise
+        except Exception:
+            self.errors += 1
+            self._record_failure()
+            raise
+        else:
+            self._record_success()
+            return resp
+        finally:
+            latency = time.perf_counter() - start
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "avg_latency_ms": round(self.total_latency / self.requests * 1000, 3)
+            if self.requests
+            else 0.0,
+            "max_latency_ms": round(self.max_latency * 1000, 3),
+            "avg_wait_ms": round(self.total_wait / self.requests * 1000, 3)
+            if self.requests
+            else 0.0,
+        }
+
+
+llm_client = LLMClient()
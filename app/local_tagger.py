@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select
+from app.config import settings
+from app.models import Book, Post as PostModel, PostTag
+from app.tag_result_cache import normalize_content
+from app.tagging import TAG_STATUS_DONE
+
+logger = logging.getLogger(__name__)
+
+# 글자 n-gram 길이 (한국어는 띄어쓰기가 제각각이라 단어 대신 음절 n-gram 사용)
+NGRAM_SIZES = (1, 2, 3)
+# n-gram 해시용 곱셈 상수 (64비트 오버플로는 그대로 버림)
+NGRAM_PRIME = np.uint64(1000003)
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+# 3개는 항상, 4~5번째 태그는 1등 점수의 이 비율 이상일 때만 붙임
+MIN_TAGS = 3
+MAX_TAGS = 5
+EXTRA_TAG_RATIO = 0.8
+# 학습 데이터 중 정확도 측정용으로 떼어두는 비율 (10개 중 1개)
+HOLDOUT_EVERY = 10
+
+
+class LocalTagger:
+    '''
+    PostTag 로 이미 태그가 붙은 게시글로 학습하는 프로세스 내 태그 분류기 (NumPy 만 사용)
+    - 책 제목 + 본문을 음절 1~3-gram 해시 특징(2^local_tagger_feature_bits 차원) TF-IDF 벡터로 만들고,
+      태그마다 그 태그가 붙은 게시글 벡터의 중심(centroid)과의 코사인 점수로 태그를 고릅니다.
+    - 예측은 특징 인덱스로 가중치 열을 골라 행렬-벡터 곱 한 번이라 LLM 호출 없이 바로 끝납니다.
+    - 학습 때 일부 게시글을 떼어 정확도와 예측 지연시간을 재서 snapshot() 으로 보여줍니다.
+    - 워커마다 따로 존재하므로 스케줄러가 주기적으로 다시 학습합니다.
+    '''
+    def __init__(self):
+        # (태그 id 배열, 태그 x 특징 가중치, idf) - 학습이 끝나면 한 번에 교체
+        self._model: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self.trained_at = 0.0
+        self.stats: Dict[str, float] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
+    @staticmethod
+    def _features(text: str, bits: int) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        (특징 인덱스, 1 + log(등장 횟수)) - 인덱스는 중복 없이 정렬
+        '''
+        codes = np.frombuffer(normalize_content(text).encode("utf-32-le"), dtype=np.uint32)
+        codes = codes.astype(np.uint64)
+        hashes = []
+        for n in NGRAM_SIZES:
+            if len(codes) < n:
+                break
+            h = np.full(len(codes) - n + 1, n, dtype=np.uint64)
+            for i in range(n):
+                h = h * NGRAM_PRIME + codes[i : len(codes) - n + 1 + i]
+            hashes.append(h)
+        if not hashes:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        index = (np.concatenate(hashes) * HASH_MULTIPLIER) >> np.uint64(64 - bits)
+        index, counts = np.unique(index.astype(np.int64), return_counts=True)
+        return index, (1 + np.log(counts)).astype(np.float32)
+
+    @staticmethod
+    def _weigh(index: np.ndarray, tf: np.ndarray, idf: np.ndarray) -> np.ndarray:
+        values = tf * idf[index]
+        norm = np.linalg.norm(values)
+        return values / norm if norm else values
+
+    def _fit(self, docs: Sequence[Tuple[str, List[int]]]) -> Dict[str, float]:
+        '''
+        (텍스트, 태그 id 목록) 으로 학습하고 떼어둔 게시글로 정확도/지연시간 측정
+        '''
+        bits = settings.local_tagger_feature_bits
+        features = [self._features(text, bits) for text, _ in docs]
+
+        df = np.zeros(1 << bits, dtype=np.float32)
+        for index, _ in features:
+            df[index] += 1
+        idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+
+        tag_ids = np.array(sorted({tag_id for _, tags in docs for tag_id in tags}), dtype=np.int64)
+        row_of = {int(tag_id): row for row, tag_id in enumerate(tag_ids)}
+        sums = np.zeros((len(tag_ids), 1 << bits), dtype=np.float32)
+        vectors = [self._weigh(index, tf, idf) for index, tf in features]
+
+        holdout = [i for i in range(len(docs)) if i % HOLDOUT_EVERY == HOLDOUT_EVERY - 1]
+        holdout_set = set(holdout)
+        for i, (_, tags) in enumerate(docs):
+            if i not in holdout_set:
+                for tag_id in tags:
+                    sums[row_of[tag_id], features[i][0]] += vectors[i]
+
+        stats = {"posts": len(docs), "tags": len(tag_ids)}
+        if holdout:
+            weights = self._normalize(sums.copy())
+            hit = predicted = actual = covered = 0
+            start = time.perf_counter()
+            for i in holdout:
+                index, tf = features[i]
+                actual_tags = docs[i][1]
+                scores = weights[:, index] @ self._weigh(index, tf, idf)
+                rows = self._choose(scores)
+                if rows is None:
+                    continue
+                covered += 1
+                chosen = set(tag_ids[rows].tolist())
+                hit += len(chosen & set(actual_tags))
+                predicted += len(chosen)
+                actual += len(actual_tags)
+            stats["holdout_posts"] = len(holdout)
+            # 점수가 낮아 LLM 에 넘긴 게시글은 빼고 정확도 계산 (coverage: 로컬에서 태그한 비율)
+            stats["coverage"] = round(covered / len(holdout), 4)
+            stats["precision"] = round(hit / predicted, 4) if predicted else 0.0
+            stats["recall"] = round(hit / actual, 4) if actual else 0.0
+            stats["predict_ms"] = round((time.perf_counter() - start) / len(holdout) * 1000, 4)
+            for i in holdout:
+                for tag_id in docs[i][1]:
+                    sums[row_of[tag_id], features[i][0]] += vectors[i]
+
+        self._model = (tag_ids, self._normalize(sums), idf)
+        return stats
+
+    @staticmethod
+    def _normalize(weights: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        weights /= norms
+        return weights
+
+    @staticmethod
+    def _choose(scores: np.ndarray) -> Optional[np.ndarray]:
+        '''
+        점수 상위 3개 + 1등 점수의 EXTRA_TAG_RATIO 이상인 태그를 최대 5개까지 (점수 내림차순 행 번호)
+        1등 점수가 local_tagger_min_score 이하면 (어휘가 겹치지 않으면 모두 0) 고를 근거가 없으므로 None
+        '''
+        order = np.argsort(-scores, kind="stable")[:MAX_TAGS]
+        if not len(order) or not scores[order[0]] > settings.local_tagger_min_score:
+            return None
+        keep = max(MIN_TAGS, int(np.sum(scores[order] >= scores[order[0]] * EXTRA_TAG_RATIO)))
+        return order[:keep]
+
+    def rank(self, tag_list: List[dict], book_title: str, content: str) -> List[Tuple[dict, float]]:
+        '''
+        tag_list 안의 태그를 점수 순으로 (태그, 점수) 반환 (학습 때 없던 태그는 점수 0)
+        '''
+        model = self._model
+        if model is None:
+            return [(tag, 0.0) for tag in tag_list]
+        tag_ids, weights, idf = model
+        index, tf = self._features(f"{book_title or ''} {content or ''}", settings.local_tagger_feature_bits)
+        scores = weights[:, index] @ self._weigh(index, tf, idf)
+        score_of = {int(tag_id): float(score) for tag_id, score in zip(tag_ids, scores)}
+        ranked = [(tag, score_of.get(int(tag["tag_id"]), 0.0)) for tag in tag_list]
+        ranked.sort(key=lambda item: -item[1])
+        return ranked
+
+    def predict(self, tag_list: List[dict], book_title: str, content: str) -> Optional[List[dict]]:
+        '''
+        make_tags 와 같은 형식으로 태그 3~5개 반환 (확신할 수 없으면 None -> LLM 사용)
+        '''
+        ranked = self.rank(tag_list, book_title, content)
+        scores = np.array([score for _, score in ranked], dtype=np.float32)
+        rows = self._choose(scores)
+        if rows is None:
+            return None
+        return [
+            {"tag_id": ranked[i][0]["tag_id"], "tag_name": ranked[i][0]["tag_name"]}
+            for i in rows
+        ]
+
+    def candidates(self, tag_list: List[dict], book_title: str, content: str) -> List[dict]:
+        '''
+        LLM 프롬프트에 넣을 후보 태그 상위 local_tagger_prefilter_size 개
+        '''
+        ranked = self.rank(tag_list, book_title, content)
+        return [tag for tag, _ in ranked[: settings.local_tagger_prefilter_size]]
+
+    async def train(self, db):
+        '''
+        태그가 붙은 최근 게시글로 다시 학습 (local_tagger_min_posts 개보다 적으면 학습하지 않음)
+        '''
+        recent = (
+            select(PostModel.id)
+            .where(PostModel.tag_status == TAG_STATUS_DONE)
+            .order_by(PostModel.id.desc())
+            .limit(settings.local_tagger_max_posts)
+            .subquery()
+        )
+        result = await db.execute(
+            select(PostModel.id, Book.title, PostModel.content, PostTag.tag_id)
+            .join(recent, recent.c.id == PostModel.id)
+            .join(PostTag, PostTag.post_id == PostModel.id)
+            .outerjoin(Book, Book.isbn == PostModel.isbn)
+            .order_by(PostModel.id)
+        )
+        docs: List[Tuple[str, List[int]]] = []
+        last_post_id = None
+        for post_id, book_title, content, tag_id in result.all():
+            if post_id != last_post_id:
+                docs.append((f"{book_title or ''} {content or ''}", []))
+                last_post_id = post_id
+            docs[-1][1].append(tag_id)
+        # 학습하는 동안 트랜잭션(과 커넥션)을 잡고 있지 않도록 읽은 뒤 바로 끝냄
+        await db.rollback()
+        if len(docs) < settings.local_tagger_min_posts:
+            logger.info(f"로컬 태그 분류기 학습 건너뜀: 게시글 {len(docs)}개")
+            return
+
+        start = time.perf_counter()
+        # 학습은 CPU 작업이라 이벤트 루프를 막지 않도록 스레드에서 실행
+        stats = await asyncio.to_thread(self._fit, docs)
+        stats["train_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self.stats = stats
+        self.trained_at = time.time()
+        logger.info(f"로컬 태그 분류기 학습: {stats}")
+
+    async def refresh(self):
+        '''
+        스케줄러 작업: 다시 학습
+        '''
+        from app.database import session_scope
+        try:
+            async with session_scope("local_tagger_train") as db:
+                await self.train(db)
+        except Exception as e:
+            logger.error(f"로컬 태그 분류기 학습 오류: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "mode": settings.local_tagger_mode,
+            "ready": self.ready,
+            "trained_at": self.trained_at,
+            **self.stats,
+        }
+
+
+local_tagger = LocalTagger()
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import VARCHAR, Column, DateTime, ForeignKey, Integer, Text
+from sqlalchemy import VARCHAR, Column, DateTime, ForeignKey, Index, Integer, Text
 from app.database import Base
 from sqlalchemy.orm import relationship
 
@@ -39,6 +39,17 @@ class User(Base):
 
 class Post(Base):
     __tablename__ = "posts"
+    # 인덱스는 alembic 마이그레이션(8d2e4b6a1c3f)에서 만들고, autogenerate 가 지우지 않도록 모델에도 선언
+    __table_args__ = (
+        # 사용자별 게시글
+        Index("ix_posts_user_id_created_at", "user_id", "created_at"),
+        # 인기 게시글: ORDER BY like_count DESC, id DESC
+        Index("ix_posts_like_count_id", "like_count", "id"),
+        # 검색 기본 정렬: ORDER BY created_at DESC, id DESC
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        # 책별 게시글
+        Index("ix_posts_isbn", "isbn"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     title = Column(VARCHAR(200))
@@ -47,6 +58,7 @@ class Post(Base):
     views = Column(Integer, default=0)
     like_count = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.now)  # 여기도 datetime으로 바꿨어요
+    tag_status = Column(VARCHAR(20), default="done")  # AI 태그 생성 상태: pending / done / failed
 
     user = relationship("User", back_populates="posts")
     comments = relationship(
@@ -72,6 +84,10 @@ class Tag(Base):
 
 class PostTag(Base):
     __tablename__ = "posttags"
+    __table_args__ = (
+        # 태그로 게시글 찾기 (관련 게시글, 추천, 태그 검색)
+        Index("ix_posttags_tag_id", "tag_id", "post_id"),
+    )
     post_id = Column(
         Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
     )
@@ -85,6 +101,12 @@ class PostTag(Base):
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # 댓글 목록: WHERE post_id = ? ORDER BY created_at
+        Index("ix_comments_post_id_created_at", "post_id", "created_at"),
+        # 대댓글 삭제 시 CASCADE 로 parent_id 를 찾음
+        Index("ix_comments_parent_id", "parent_id"),
+    )
     id = Column(Integer, primary_key=True)
     post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"))
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -104,6 +126,12 @@ class Comment(Base):
 
 class Like(Base):
     __tablename__ = "likes"
+    __table_args__ = (
+        # 좋아요한 게시글: WHERE user_id = ? ORDER BY created_at DESC, post_id DESC
+        Index("ix_likes_user_id_created_at", "user_id", "created_at", "post_id"),
+        # 게시글의 좋아요 목록 (PK 는 user_id 로 시작해서 post_id 조회에 못 씀)
+        Index("ix_likes_post_id", "post_id"),
+    )
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
     )
@@ -118,6 +146,10 @@ class Like(Base):
 
 class Follow(Base):
     __tablename__ = "follows"
+    __table_args__ = (
+        # 팔로워 목록: WHERE following_id = ?
+        Index("ix_follows_following_id", "following_id", "follower_id"),
+    )
     follower_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
     )  # 팔로우 하는 사람
@@ -152,3 +184,10 @@ class UserTagPreference(Base):
     )
     tag_id = Column(Integer, ForeignKey("tags.id",ondelete="CASCADE"), primary_key=True)
     frequency = Column(Integer, default=1)
+
+
+class SchedulerFence(Base):
+    __tablename__ = "scheduler_fences"
+    # 리더 선출 이름별로 DB에 마지막으로 반영한 펜싱 토큰 (더 낮은 토큰의 커밋은 거부)
+    name = Column(VARCHAR(50), primary_key=True)
+    token = Column(Integer, nullable=False)
@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Sequence
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+# 다음 페이지 커서를 돌려주는 응답 헤더 (응답 본문 형식은 그대로 유지)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    '''
+    마지막 행의 정렬 키 값들을 불투명한 커서 문자열로 인코딩
+    '''
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, types: Sequence[Callable]) -> List[Any]:
+    '''
+    커서를 정렬 키 값들로 복원 (types: 각 키의 타입, 예: [datetime, int])
+    '''
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("커서 길이가 올바르지 않습니다.")
+        return [
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for type_, value in zip(types, values)
+        ]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="잘못된 커서입니다."
+        )
+
+
+def after_cursor(columns: Sequence[Any], values: Sequence[Any]):
+    '''
+    모든 정렬 키가 내림차순일 때 커서 다음 행만 고르는 조건
+    (columns) < (values) 행 비교라서 복합 인덱스를 그대로 탈 수 있습니다.
+    '''
+    return tuple_(*columns) < tuple_(*values)
+
+
+def set_next_cursor(response: Response, rows: Sequence[Any], limit: int, key: Callable):
+    '''
+    페이지가 꽉 찼으면 마지막 행 기준의 다음 커서를 헤더로 내려줌
+    '''
+    if rows and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(rows[-1]))
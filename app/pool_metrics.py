@@ -0,0 +1,80 @@
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    '''
+    커넥션 풀 체크아웃 대기시간 / 타임아웃 누적 통계
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.scope_violations = 0
+
+    def record_checkout(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_timeout(self, wait: float):
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_scope_violation(self):
+        with self._lock:
+            self.scope_violations += 1
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.scope_violations = 0
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3)
+                if self.checkouts
+                else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "scope_violations": self.scope_violations,
+            }
+        if isinstance(pool, QueuePool):
+            data.update(
+                {
+                    "pool_size": pool.size(),
+                    "in_use": pool.checkedout(),
+                    "idle": pool.checkedin(),
+                    "overflow": max(pool.overflow(), 0),
+                }
+            )
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    '''
+    커넥션을 꺼낼 때까지 걸린 시간을 pool_metrics에 기록하는 풀
+    '''
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout(time.perf_counter() - start)
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start)
+        return conn
@@ -0,0 +1,12 @@
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from app.models import Post as PostModel
+
+
+def select_posts(*columns):
+    '''
+    schemas.Post 로 응답할 게시글 조회 쿼리
+    - tags 를 페이지 단위 IN 쿼리 한 번으로 같이 불러옴 (게시글마다 태그 조회 X)
+    - columns 를 주면 정렬 키 같은 값을 함께 조회: select_posts(Like.created_at)
+    '''
+    return select(PostModel, *columns).options(selectinload(PostModel.tags))
@@ -0,0 +1,52 @@
+from typing import Dict, Iterable, List, Tuple
+from app.config import settings
+from app.models import Post as PostModel
+from app.redis_client import redis_client
+from app.schemas import Post
+
+
+async def pending_counts(post_ids: Iterable[int], likes: bool) -> Tuple[Dict[int, int], Dict[int, int]]:
+    '''
+    아직 DB에 반영되지 않은 (조회수, 좋아요 수 증감)을 MGET 한 번으로 가져옴
+    좋아요 증감은 대기 중인 것과 스케줄러가 반영 중인 것(inflight)의 합
+    likes=False 면 좋아요 증감은 조회하지 않음
+    '''
+    post_ids = list(post_ids)
+    count = len(post_ids)
+    keys = [f"post:{post_id}:views" for post_id in post_ids]
+    if likes:
+        keys += [f"post:{post_id}:likes:delta" for post_id in post_ids]
+        keys += [f"post:{post_id}:likes:inflight_delta" for post_id in post_ids]
+    values = await redis_client.mget(keys)
+
+    def to_dict(values):
+        return {
+            post_id: int(value)
+            for post_id, value in zip(post_ids, values)
+            if value is not None
+        }
+
+    like_deltas = to_dict(values[count : 2 * count])
+    for post_id, delta in to_dict(values[2 * count :]).items():
+        like_deltas[post_id] = like_deltas.get(post_id, 0) + delta
+    return to_dict(values[:count]), like_deltas
+
+
+async def with_live_views(posts: List[PostModel]) -> List[Post]:
+    '''
+    DB 조회수에 Redis에 쌓인 조회수를 더해서 응답 스키마로 변환
+    (like_write_behind 모드면 반영 대기 중인 좋아요 수도 더함)
+    (ORM 객체는 건드리지 않으므로 세션에 변경이 생기지 않음)
+    '''
+    views, likes = await pending_counts(
+        (post.id for post in posts), likes=settings.like_write_behind
+    )
+    return [
+        Post.model_validate(post).model_copy(
+            update={
+                "views": (post.views or 0) + views.get(post.id, 0),
+                "like_count": (post.like_count or 0) + likes.get(post.id, 0),
+            }
+        )
+        for post in posts
+    ]
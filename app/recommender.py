@@ -0,0 +1,179 @@
+import logging
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import func, select
+from app.config import settings
+from app.leaderboard import PostRanking
+from app.models import Post as PostModel, PostTag, UserTagPreference
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# 이미 만들어진 추천 목록에만 새 게시글을 넣고, 최대 개수를 넘으면 점수가 낮은 것부터 잘라냄
+# 목록이 비어 있던 사용자는 ZADD 가 키를 새로 만들므로 매번 준비 표시 키와 같이 만료되도록 맞춤
+# KEYS = [추천 목록, 준비 표시 키], ARGV = [멤버, 점수, 최대 개수, 만료(초)]
+ADD_CANDIDATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+    redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[3]) + 1))
+    local ttl = redis.call('PTTL', KEYS[2])
+    if ttl > 0 then
+        redis.call('PEXPIRE', KEYS[1], ttl)
+    else
+        redis.call('EXPIRE', KEYS[1], ARGV[4])
+    end
+    return 1
+end
+return 0
+"""
+
+
+def tag_affinity_scores(user_id: int):
+    '''
+    사용자 태그 선호도로 계산한 게시글 점수 서브쿼리 (post_id, score)
+    점수 = 겹치는 태그의 선호도 합 * 겹치는 태그 수
+    '''
+    subquery = (
+        select(
+            PostTag.post_id,
+            func.sum(UserTagPreference.frequency).label("frequency_score"),
+            func.count(PostTag.tag_id).label("match_score"),
+        )
+        .join(UserTagPreference, PostTag.tag_id == UserTagPreference.tag_id)
+        .where(UserTagPreference.user_id == user_id)
+        .group_by(PostTag.post_id)
+        .subquery()
+    )
+    return select(
+        subquery.c.post_id,
+        (subquery.c.frequency_score * subquery.c.match_score).label("score"),
+    ).subquery()
+
+
+class RecommendationCache:
+    '''
+    사용자별 추천 후보 목록 (Redis ZSET, 점수 상위 recommend_candidates_size 개)
+    - 처음 요청하거나 만료되면 백그라운드에서 DB 로 한 번 계산해서 저장합니다.
+    - 게시글을 쓰면 작성자 선호도가 바뀌므로 작성자 목록은 다시 계산하고,
+      새 게시글은 그 태그를 선호하는 다른 사용자의 목록에 점수만 계산해서 추가합니다.
+    - 준비 표시 키가 있어야 목록을 사용하므로 후보가 없는 사용자도 DB 를 다시 조회하지 않습니다.
+    '''
+    def __init__(self, size: int, ttl: int):
+        self.size = size
+        self.ttl = ttl
+        self._add_script = None
+
+    def ranking(self, user_id: int) -> PostRanking:
+        return PostRanking(f"user:{user_id}:recommend")
+
+    @staticmethod
+    def _ready_key(user_id: int) -> str:
+        return f"user:{user_id}:recommend:ready"
+
+    async def read(
+        self,
+        db,
+        user_id: int,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[float, int]] = None,
+    ) -> Optional[List[Tuple[PostModel, float]]]:
+        '''
+        추천 순서대로 (게시글, 점수) 목록 반환, 목록이 아직 없으면 None
+        '''
+        try:
+            if not await redis_client.redis.exists(self._ready_key(user_id)):
+                return None
+        except Exception as e:
+            logger.error(f"추천 목록 조회 오류: {e}")
+            return None
+        return await self.ranking(user_id).read(db, limit, offset=offset, after=after)
+
+    async def refresh_user(self, db, user_id: int):
+        '''
+        사용자 추천 목록 전체를 DB 기준으로 다시 계산
+        '''
+        scores = tag_affinity_scores(user_id)
+        result = await db.execute(
+            select(scores.c.post_id, scores.c.score)
+            .join(PostModel, PostModel.id == scores.c.post_id)
+            .where(PostModel.user_id != user_id)
+            .order_by(scores.c.score.desc(), scores.c.post_id.desc())
+            .limit(self.size)
+        )
+        ranking = self.ranking(user_id)
+        mapping = {ranking.member(post_id): score for post_id, score in result.all()}
+        try:
+            async with redis_client.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(ranking.key)
+                if mapping:
+                    pipe.zadd(ranking.key, mapping)
+                pipe.expire(ranking.key, self.ttl)
+                pipe.set(self._ready_key(user_id), 1, ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"추천 목록 저장 오류: {e}")
+
+    async def add_post(self, db, post_id: int, author_id: Optional[int], tag_ids: Iterable[int]):
+        '''
+        새로 태그가 붙은 게시글을 그 태그를 선호하는 사용자들의 목록에 추가
+        '''
+        tag_ids = list(tag_ids)
+        if not tag_ids:
+            return
+        query = (
+            select(
+                UserTagPreference.user_id,
+                func.sum(UserTagPreference.frequency),
+                func.count(UserTagPreference.tag_id),
+            )
+            .where(UserTagPreference.tag_id.in_(tag_ids))
+            .group_by(UserTagPreference.user_id)
+        )
+        if author_id is not None:
+            query = query.where(UserTagPreference.user_id != author_id)
+        result = await db.execute(query)
+        rows = result.all()
+        if not rows:
+            return
+        try:
+            if self._add_script is None:
+                self._add_script = redis_client.redis.register_script(ADD_CANDIDATE_SCRIPT)
+            async with redis_client.redis.pipeline(transaction=False) as pipe:
+                for user_id, frequency_score, match_score in rows:
+                    await self._add_script(
+                        keys=[self.ranking(user_id).key, self._ready_key(user_id)],
+                        args=[
+                            PostRanking.member(post_id),
+                            frequency_score * match_score,
+                            self.size,
+                            self.ttl,
+                        ],
+                        client=pipe,
+                    )
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"추천 목록 갱신 오류: {e}")
+
+    async def on_post_tagged(self, post_id: int, author_id: Optional[int], tag_ids: Iterable[int]):
+        '''
+        게시글에 태그가 붙은 뒤 호출 (응답 후 백그라운드 작업으로 실행)
+        '''
+        from app.database import session_scope
+        async with session_scope("recommendation_refresh") as db:
+            if author_id is not None:
+                await self.refresh_user(db, author_id)
+            await self.add_post(db, post_id, author_id, tag_ids)
+
+    async def build(self, user_id: int):
+        '''
+        목록이 없는 사용자의 추천 목록 생성 (응답 후 백그라운드 작업으로 실행)
+        '''
+        from app.database import session_scope
+        async with session_scope("recommendation_build") as db:
+            await self.refresh_user(db, user_id)
+
+
+recommendation_cache = RecommendationCache(
+    size=settings.recommend_candidates_size,
+    ttl=settings.recommend_cache_ttl,
+)
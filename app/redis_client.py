@@ -1,12 +1,127 @@
-from typing import Optional
+import asyncio
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import redis.asyncio as redis
 import logging
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# 조회수 중복 제거 스크립트 - 새로운 조회면 조회수 증가까지 한 번의 왕복으로 원자적으로 처리
+# key  : (게시글, IP)마다 키 1개. 정확하지만 조회 1건당 키 1개(약 100B)가 24시간 유지됨
+# hll  : 게시글/일자마다 HyperLogLog 1개(희소 표현이라 조회가 적으면 수십 B, 최대 12KB).
+#        PFADD 가 1을 돌려줘도 새 사용자라는 뜻이 아니므로(레지스터가 바뀌었다는 뜻) 카디널리티(PFCOUNT)가
+#        지금까지 반영한 값보다 커진 만큼 조회수를 올림 (표준오차 약 0.81%)
+# 조회수가 늘어난 게시글 id는 DIRTY_VIEWS_KEY 셋에 넣어 스케줄러가 그 게시글만 동기화합니다.
+# KEYS = [dedup 키, 조회수 키, dirty 셋(, hll: 반영한 카디널리티 키)], ARGV = [post_id, expire, ...]
+# 반환: 늘어난 조회수
+VIEW_SCRIPTS = {
+    "key": """
+if redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[2]) then
+    redis.call('INCR', KEYS[2])
+    redis.call('SADD', KEYS[3], ARGV[1])
+    return 1
+end
+return 0
+""",
+    "hll": """
+if redis.call('PFADD', KEYS[1], ARGV[3]) == 0 then
+    return 0
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+local count = redis.call('PFCOUNT', KEYS[1])
+local delta = count - tonumber(redis.call('GET', KEYS[4]) or '0')
+if delta <= 0 then
+    return 0
+end
+redis.call('SET', KEYS[4], count, 'EX', ARGV[2])
+redis.call('INCRBY', KEYS[2], delta)
+redis.call('SADD', KEYS[3], ARGV[1])
+return delta
+""",
+}
+
+DIRTY_VIEWS_KEY = "posts:views:dirty"
+
+# 좋아요 write-behind 스크립트
+# post:{id}:likes:ops  : 해시 {user_id: '1'(좋아요) / '0'(취소)}, DB 상태와 다른 사용자만 기록
+# post:{id}:likes:delta: DB like_count 에 아직 반영되지 않은 증감 합계
+# post:{id}:likes:inflight(_delta): 스케줄러가 꺼내서 DB에 반영 중인 토글과 증감 (커밋 후 지움)
+#   커밋 전까지는 DB 대신 이 값이 기준이라, 반영 중에 다시 누른 토글이 사라지지 않습니다.
+# 바뀐 게시글 id는 DIRTY_LIKES_KEY 셋에 넣어 스케줄러가 그 게시글만 DB에 반영합니다.
+LIKE_SCRIPTS = {
+    # KEYS = [ops, delta, dirty 셋, inflight, inflight_delta], ARGV = [user_id, post_id, DB 좋아요 여부(0/1)]
+    # 반환: [토글 후 좋아요 여부, 반영 대기 증감 (반영 중인 증감 포함)]
+    "like_toggle": """
+local base = redis.call('HGET', KEYS[4], ARGV[1]) or ARGV[3]
+local liked = redis.call('HGET', KEYS[1], ARGV[1]) or base
+local new = '1'
+if liked == '1' then
+    new = '0'
+end
+if new == base then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+else
+    redis.call('HSET', KEYS[1], ARGV[1], new)
+end
+local delta = redis.call('INCRBY', KEYS[2], new == '1' and 1 or -1)
+redis.call('SADD', KEYS[3], ARGV[2])
+return {tonumber(new), delta + tonumber(redis.call('GET', KEYS[5]) or '0')}
+""",
+    # KEYS = [ops, delta, inflight, inflight_delta], ARGV = [inflight 만료(초)]
+    # 반환: HGETALL 결과 (꺼낸 토글은 커밋될 때까지 inflight 로 옮김)
+    "like_drain": """
+local ops = redis.call('HGETALL', KEYS[1])
+if #ops > 0 then
+    for i = 1, #ops, 2 do
+        redis.call('HSET', KEYS[3], ops[i], ops[i + 1])
+    end
+    redis.call('INCRBY', KEYS[4], tonumber(redis.call('GET', KEYS[2]) or '0'))
+    redis.call('EXPIRE', KEYS[3], ARGV[1])
+    redis.call('EXPIRE', KEYS[4], ARGV[1])
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+return ops
+""",
+    # KEYS = [ops, delta, dirty 셋, inflight, inflight_delta], ARGV = [post_id]
+    # inflight 토글을 되돌려놓음. 반영 중에 같은 사용자가 다시 누른 토글은 inflight 의 반대,
+    # 즉 DB 상태와 같으므로 둘 다 버림. 증감 합계는 해시 기준으로 다시 계산
+    "like_restore": """
+local inflight = redis.call('HGETALL', KEYS[4])
+for i = 1, #inflight, 2 do
+    if redis.call('HEXISTS', KEYS[1], inflight[i]) == 1 then
+        redis.call('HDEL', KEYS[1], inflight[i])
+    else
+        redis.call('HSET', KEYS[1], inflight[i], inflight[i + 1])
+    end
+end
+redis.call('DEL', KEYS[4], KEYS[5])
+local delta = 0
+local ops = redis.call('HVALS', KEYS[1])
+for _, op in ipairs(ops) do
+    delta = delta + (op == '1' and 1 or -1)
+end
+redis.call('SET', KEYS[2], delta)
+redis.call('SADD', KEYS[3], ARGV[1])
+return delta
+""",
+}
+
+DIRTY_LIKES_KEY = "posts:likes:dirty"
+# 반영 중에 스케줄러가 죽어서 inflight 가 남았을 때 기준 상태로 쓰지 않도록 만료
+LIKE_INFLIGHT_EXPIRE = 300
+
+# 일자별 구조는 하루가 지나면 쓰지 않으므로 이틀 뒤 만료
+DAILY_DEDUP_EXPIRE = 172800
+
+# pub/sub 구독이 끊겼을 때 다시 연결하기 전 대기 시간(초)
+RESUBSCRIBE_DELAY = 5
+
+
 class RedisManager:
     def __init__(self):
         self.redis = None
+        self._scripts = {}
 
     async def connect(self):
         try:
@@ -25,6 +140,40 @@ class RedisManager:
             logger.error(f'Redis disconnect 오류 : {e}')
             
             
+    async def subscribe(
+        self,
+        channel: str,
+        on_message: Callable[[Optional[str]], None],
+        on_reset: Optional[Callable[[], None]] = None,
+    ):
+        '''
+        channel 을 구독해서 메시지마다 on_message(내용) 호출 (취소될 때까지 실행, 끊기면 다시 구독)
+        구독을 (다시) 시작할 때와 끊겼을 때는 그 사이 메시지를 놓쳤을 수 있으므로 on_reset() 호출
+        '''
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(channel)
+                if on_reset:
+                    on_reset()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        on_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis {channel} 구독 오류: {e}")
+                if on_reset:
+                    on_reset()
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
+
     async def get(self, key:str):
         try:
             return await self.redis.get(key)
@@ -59,6 +208,15 @@ class RedisManager:
             logger.error(f"Redis exists 오류: {e}")
             return False
     
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        try:
+            if not keys:
+                return []
+            return await self.redis.mget(keys)
+        except Exception as e:
+            logger.error(f"Redis mget 오류: {e}")
+            return [None] * len(keys)
+
     async def incr(self, key: str, amount: int = 1):
         try:
             result : int = await self.redis.incr(key, amount)
@@ -77,6 +235,187 @@ class RedisManager:
             logger.error(f"Redis getset 오류: {e}")
             return 0
 
+    def _script(self, name: str):
+        if name not in self._scripts:
+            self._scripts[name] = self.redis.register_script({**VIEW_SCRIPTS, **LIKE_SCRIPTS}[name])
+        return self._scripts[name]
+
+    async def record_view(self, post_id: int, client_ip: str, expire: int = 86400) -> bool:
+        '''
+        조회 기록 (같은 IP 중복 조회는 무시)
+        - key 방식: expire 초 안의 중복 제거
+        - hll 방식: 같은 날짜 안의 중복 제거 (근사)
+        조회수가 늘었으면 True, 중복 조회면 False
+        '''
+        backend = settings.view_dedup_backend
+        views_key = f"post:{post_id}:views"
+        try:
+            if backend == "hll":
+                day = datetime.now().strftime("%Y%m%d")
+                hll_key = f"post:{post_id}:viewed:hll:{day}"
+                keys = [hll_key, views_key, DIRTY_VIEWS_KEY, f"{hll_key}:counted"]
+                args = [post_id, DAILY_DEDUP_EXPIRE, client_ip]
+            else:
+                keys = [f"post:{post_id}:viewed:{client_ip}", views_key, DIRTY_VIEWS_KEY]
+                args = [post_id, expire]
+            result = await self._script(backend)(keys=keys, args=args)
+            return result > 0
+        except Exception as e:
+            logger.error(f"Redis record_view 오류: {e}")
+            return False
+
+    async def drain_view_deltas(self, count: int) -> Optional[Dict[int, int]]:
+        '''
+        dirty 셋에서 게시글을 최대 count개 꺼내고 쌓인 조회수를 가져오면서 0으로 비움
+        {post_id: 증가량} 반환, 더 꺼낼 게시글이 없으면 None
+        '''
+        try:
+            post_ids = await self.redis.spop(DIRTY_VIEWS_KEY, count)
+            if not post_ids:
+                return None
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for post_id in post_ids:
+                    pipe.getdel(f"post:{post_id}:views")
+                results = await pipe.execute()
+            return {
+                int(post_id): int(value)
+                for post_id, value in zip(post_ids, results)
+                if value and int(value) != 0
+            }
+        except Exception as e:
+            logger.error(f"Redis drain_view_deltas 오류: {e}")
+            return None
+
+    async def restore_view_deltas(self, deltas: Dict[int, int]):
+        '''
+        DB 반영에 실패한 조회수를 다시 Redis에 돌려놓음
+        '''
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for post_id, delta in deltas.items():
+                    pipe.incrby(f"post:{post_id}:views", delta)
+                    pipe.sadd(DIRTY_VIEWS_KEY, post_id)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis restore_view_deltas 오류: {e}")
+
+    async def mark_dirty_views(self) -> int:
+        '''
+        dirty 셋 도입 전에 쌓인 조회수 키를 SCAN으로 찾아 dirty 셋에 등록
+        '''
+        marked = 0
+        try:
+            async for key in self.redis.scan_iter(match="post:*:views", count=1000):
+                await self.redis.sadd(DIRTY_VIEWS_KEY, key.split(":")[1])
+                marked += 1
+        except Exception as e:
+            logger.error(f"Redis mark_dirty_views 오류: {e}")
+        return marked
+
+    @staticmethod
+    def _like_keys(post_id: int) -> List[str]:
+        '''
+        [ops, delta, dirty 셋, inflight, inflight_delta]
+        '''
+        return [
+            f"post:{post_id}:likes:ops",
+            f"post:{post_id}:likes:delta",
+            DIRTY_LIKES_KEY,
+            f"post:{post_id}:likes:inflight",
+            f"post:{post_id}:likes:inflight_delta",
+        ]
+
+    async def toggle_like(self, post_id: int, user_id: int, db_liked: bool) -> Optional[Tuple[bool, int]]:
+        '''
+        write-behind 좋아요 토글 (DB에는 스케줄러가 나중에 반영)
+        (토글 후 좋아요 여부, 반영 대기 중인 like_count 증감) 반환, Redis 오류면 None
+        '''
+        try:
+            liked, delta = await self._script("like_toggle")(
+                keys=self._like_keys(post_id), args=[user_id, post_id, int(db_liked)]
+            )
+            return bool(liked), int(delta)
+        except Exception as e:
+            logger.error(f"Redis toggle_like 오류: {e}")
+            return None
+
+    async def pending_like(self, post_id: int, user_id: Optional[int] = None) -> Tuple[Optional[bool], int]:
+        '''
+        반영 대기 중인 (user_id 의 좋아요 여부, like_count 증감) - DB 반영 중인 토글 포함
+        user_id 의 토글이 없으면 좋아요 여부는 None (DB 상태 그대로)
+        '''
+        ops_key, delta_key, _, inflight_key, inflight_delta_key = self._like_keys(post_id)
+        field = user_id if user_id is not None else ""
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hget(ops_key, field)
+                pipe.get(delta_key)
+                pipe.hget(inflight_key, field)
+                pipe.get(inflight_delta_key)
+                op, delta, inflight_op, inflight_delta = await pipe.execute()
+            if op is None:
+                op = inflight_op
+            return (None if op is None else op == "1"), int(delta or 0) + int(inflight_delta or 0)
+        except Exception as e:
+            logger.error(f"Redis pending_like 오류: {e}")
+            return None, 0
+
+    async def drain_like_ops(self, count: int) -> Optional[Dict[int, Dict[int, bool]]]:
+        '''
+        dirty 셋에서 게시글을 최대 count개 꺼내고 쌓인 토글을 가져오면서 비움
+        꺼낸 토글은 DB에 커밋한 뒤 clear_inflight_likes, 실패하면 restore_like_ops 로 정리
+        {post_id: {user_id: 좋아요 여부}} 반환, 더 꺼낼 게시글이 없으면 None
+        '''
+        try:
+            post_ids = await self.redis.spop(DIRTY_LIKES_KEY, count)
+            if not post_ids:
+                return None
+            script = self._script("like_drain")
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for post_id in post_ids:
+                    ops_key, delta_key, _, inflight_key, inflight_delta_key = self._like_keys(post_id)
+                    await script(
+                        keys=[ops_key, delta_key, inflight_key, inflight_delta_key],
+                        args=[LIKE_INFLIGHT_EXPIRE],
+                        client=pipe,
+                    )
+                results = await pipe.execute()
+            ops = {}
+            for post_id, flat in zip(post_ids, results):
+                if flat:
+                    ops[int(post_id)] = {
+                        int(user_id): op == "1" for user_id, op in zip(flat[::2], flat[1::2])
+                    }
+            return ops
+        except Exception as e:
+            logger.error(f"Redis drain_like_ops 오류: {e}")
+            return None
+
+    async def clear_inflight_likes(self, post_ids: Iterable[int]):
+        '''
+        DB에 커밋한 토글을 inflight 에서 지움 (이제 DB 상태가 기준)
+        '''
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for post_id in post_ids:
+                    pipe.delete(*self._like_keys(post_id)[3:])
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis clear_inflight_likes 오류: {e}")
+
+    async def restore_like_ops(self, post_ids: Iterable[int]):
+        '''
+        DB 반영에 실패한 게시글의 inflight 토글을 다시 대기 토글로 돌려놓음
+        '''
+        try:
+            script = self._script("like_restore")
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for post_id in post_ids:
+                    await script(keys=self._like_keys(post_id), args=[post_id], client=pipe)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis restore_like_ops 오류: {e}")
+
 
 redis_client = RedisManager()
         
@@ -1,27 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User as UserModel
 from app.schemas import UserCreate, UserResponse, Login as LoginRequest, WithdrawRequest
-from app.security import PasswordHasher, create_access_token, get_current_user
+from app.security import PasswordHasher, create_access_token, get_current_user, load_password_hash
+from app.user_cache import user_cache
 
 router = APIRouter(prefix="/auth", tags=["Auth"])  # 인증 엔드포인트
 
 # 회원가입
 @router.post("/signup", response_model=UserResponse)
-def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     
     if user_data.password != user_data.password_test:
         raise HTTPException(status_code=400, detail="비밀번호가 일치하지 않습니다.")
         
     # 이메일 중복 확인
-    if db.query(UserModel).filter(UserModel.email == user_data.email).first():
+    result = await db.execute(select(UserModel).where(UserModel.email == user_data.email))
+    if result.scalars().first():
         raise HTTPException(status_code=400, detail="이미 사용 중인 이메일입니다.")
     
     # 사용자 이름 중복 확인
-    if db.query(UserModel).filter(UserModel.username == user_data.username).first():
+    result = await db.execute(select(UserModel).where(UserModel.username == user_data.username))
+    if result.scalars().first():
         raise HTTPException(status_code=400, detail="이미 사용 중인 사용자 이름입니다.")
     
     # 비밀번호 해시
@@ -36,16 +40,17 @@ def signup(user_data: UserCreate, db: Session = Depends(get_db)):
         created_at=datetime.now()
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return new_user
 
 # 로그인 (JWT 발급)
 @router.post("/login")
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     # 사용자 조회
-    user = db.query(UserModel).filter(UserModel.email == login_data.email).first()
+    result = await db.execute(select(UserModel).where(UserModel.email == login_data.email))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=401, detail="존재하지 않는 이메일입니다.")
 
@@ -60,22 +65,24 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 # 로그아웃
 @router.post("/logout")
-def logout(user: UserModel = Depends(get_current_user)):
+async def logout(user: UserModel = Depends(get_current_user)):
     return {"message": "로그아웃 되었습니다."}
 
 # 회원 탈퇴
 @router.delete("/withdraw")
-def withdraw(
+async def withdraw(
     withdraw_data: WithdrawRequest,
     user: UserModel = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
 
     # 비밀번호 검증
-    if not PasswordHasher.verify_password_combined(withdraw_data.password, user.password_hash):
+    password_hash = await load_password_hash(db, user.id)
+    if not password_hash or not PasswordHasher.verify_password_combined(withdraw_data.password, password_hash):
         raise HTTPException(status_code=401, detail="비밀번호가 일치하지 않습니다.")
 
     # 사용자 삭제
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    await user_cache.invalidate(user.id)
     return {"detail": "회원 탈퇴가 완료되었습니다."}
\ No newline at end of file
@@ -0,0 +1,51 @@
+from fastapi import APIRouter
+from app.database import async_engine
+from app.llm_client import llm_client
+from app.local_tagger import local_tagger
+from app.tag_catalog import tag_catalog
+from app.tag_result_cache import tag_result_cache
+from app.pool_metrics import pool_metrics
+
+# 내부 운영용 엔드포인트 (nginx에서 외부 노출 차단)
+router = APIRouter(prefix="/internal", tags=["Internal"], include_in_schema=False)
+
+
+@router.get("/db-pool")
+async def db_pool_status():
+    """
+    커넥션 풀 사용량과 체크아웃 대기시간을 반환합니다.
+    """
+    return pool_metrics.snapshot(async_engine.pool)
+
+
+@router.get("/llm")
+async def llm_status():
+    """
+    태그 생성 LLM 호출 지연시간/오류 수와 서킷 브레이커 상태를 반환합니다.
+    """
+    return llm_client.snapshot()
+
+
+@router.get("/tag-cache")
+async def tag_cache_status():
+    """
+    AI 태그 생성 결과 캐시 적중률을 반환합니다.
+    """
+    return tag_result_cache.snapshot()
+
+
+@router.get("/local-tagger")
+async def local_tagger_status():
+    """
+    로컬 태그 분류기 학습 상태와 떼어둔 게시글 기준 정확도/예측 지연시간을 반환합니다.
+    """
+    return local_tagger.snapshot()
+
+
+@router.post("/tag-catalog/invalidate")
+async def invalidate_tag_catalog():
+    """
+    태그를 DB 에서 직접 바꾼 뒤 호출하면 모든 워커의 태그 목록 캐시를 비웁니다.
+    """
+    await tag_catalog.invalidate()
+    return {"message": "태그 목록 캐시를 비웠습니다."}
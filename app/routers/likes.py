@@ -1,11 +1,21 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import and_, insert, update, delete
-from sqlalchemy.orm import Session
-from app.database import get_db
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
 from app.schemas import Post
 from app.models import Like, Post as PostModel, User
-from app.security import get_current_user
+from app.leaderboard import popular_leaderboard
+from app.post_loader import select_posts
+from app.pagination import after_cursor, decode_cursor, set_next_cursor
+from app.post_views import with_live_views
+from app.redis_client import redis_client
+from app.security import get_current_user, get_current_user_optional
 
 
 router = APIRouter(prefix="/likes", tags=["Likes"])
@@ -13,76 +23,192 @@ router = APIRouter(prefix="/likes", tags=["Likes"])
 
 @router.get("/user", response_model=List[Post])
 async def user_likes(
+    response: Response,
     page: int = 1,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    posts = (
-        db.query(PostModel)
+    """
+    cursor 를 주면 (좋아요 시각, 게시글 id) 기준 키셋 페이지네이션, 없으면 page 사용
+    다음 커서는 X-Next-Cursor 헤더로 내려갑니다.
+    """
+    sort_keys = (Like.created_at, Like.post_id)
+    query = (
+        select_posts(*sort_keys)
         .join(Like, Like.post_id == PostModel.id)
-        .filter(Like.user_id == current_user.id)
-        .order_by(Like.created_at.desc())
-        .offset(limit * (page - 1))
-        .limit(limit)
-        .all()
+        .where(Like.user_id == current_user.id)
+        .order_by(*(key.desc() for key in sort_keys))
     )
+    if cursor:
+        query = query.where(after_cursor(sort_keys, decode_cursor(cursor, [datetime, int])))
+    else:
+        query = query.offset(limit * (page - 1))
 
-    return posts
+    result = await db.execute(query.limit(limit))
+    rows = result.all()
+    set_next_cursor(response, rows, limit, key=lambda row: (row[1], row[2]))
+
+    return await with_live_views([row[0] for row in rows])
 
 
 @router.get("/{post_id}/likes")
-async def post_likes(post_id: int, db: Session = Depends(get_db)):
-    
-    post = db.query(PostModel).filter(PostModel.id == post_id).first()
+async def post_likes(
+    post_id: int,
+    response: Response,
+    page: int = 1,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    좋아요 수는 posts.like_count 에서, 좋아요한 사용자는 최근 순으로 limit 명씩
+    liked: 로그인한 사용자가 좋아요 했는지 (비로그인이면 false)
+    cursor 를 주면 키셋 페이지네이션, 다음 커서는 X-Next-Cursor 헤더로 내려갑니다.
+    """
+    result = await db.execute(select(PostModel.like_count).where(PostModel.id == post_id))
+    post = result.first()
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시물 입니다.")
-    
 
-    users = [user.user_id for user in post.likes]
-    like_count = len(users)
+    sort_keys = (Like.created_at, Like.user_id)
+    query = (
+        select(*sort_keys)
+        .where(Like.post_id == post_id)
+        .order_by(*(key.desc() for key in sort_keys))
+    )
+    if cursor:
+        query = query.where(after_cursor(sort_keys, decode_cursor(cursor, [datetime, int])))
+    else:
+        query = query.offset(limit * (page - 1))
+    result = await db.execute(query.limit(limit))
+    rows = result.all()
+    set_next_cursor(response, rows, limit, key=lambda row: (row.created_at, row.user_id))
+
+    # write-behind 모드에서 아직 DB에 반영되지 않은 토글 (본인 토글은 바로 보이도록)
+    pending_liked, pending_delta = await redis_client.pending_like(
+        post_id, current_user.id if current_user else None
+    )
+    liked = False
+    if current_user and pending_liked is not None:
+        liked = pending_liked
+    elif current_user:
+        result = await db.execute(
+            select(Like.user_id).where(
+                and_(Like.post_id == post_id, Like.user_id == current_user.id)
+            )
+        )
+        liked = result.first() is not None
+
+    return {
+        "like_count": (post.like_count or 0) + pending_delta,
+        "liked": liked,
+        "users": [row.user_id for row in rows],
+    }
+
+
+def insert_like_ignore(db: AsyncSession):
+    """
+    이미 좋아요한 경우 아무것도 하지 않는 INSERT (INSERT ... ON CONFLICT DO NOTHING)
+    """
+    if db.bind.dialect.name == "postgresql":
+        return postgresql_insert(Like).on_conflict_do_nothing()
+    return sqlite_insert(Like).on_conflict_do_nothing()
+
+
+async def buffered_like(post_id: int, current_user: User, db: AsyncSession) -> Optional[dict]:
+    """
+    write-behind 좋아요 토글: DB는 읽기만 하고 토글은 Redis 에 기록
+    (스케줄러가 flush_buffered_likes 로 likes 테이블과 like_count 에 반영)
+    Redis 를 쓸 수 없으면 None -> 바로 DB에 반영
+    """
+    liked_in_db = (
+        select(Like.user_id)
+        .where(and_(Like.post_id == PostModel.id, Like.user_id == current_user.id))
+        .exists()
+    )
+    result = await db.execute(
+        select(PostModel.like_count, liked_in_db.label("liked")).where(PostModel.id == post_id)
+    )
+    post = result.first()
+    if post is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시글 입니다."
+        )
 
-    return {"like_count": like_count, "users": users}
+    toggled = await redis_client.toggle_like(post_id, current_user.id, bool(post.liked))
+    if toggled is None:
+        return None
+    liked, pending_delta = toggled
+    return {"liked": liked, "like_count": (post.like_count or 0) + pending_delta}
 
 
 @router.post("/{post_id}/like")
 async def like_post(
     post_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
-    post = db.query(PostModel).filter(PostModel.id == post_id).first()
-    if not post:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시글 입니다."
-        )
-
-    post_likes = post.likes
-    is_like = current_user.id in [user.user_id for user in post_likes]
+    """
+    좋아요 토글
+    - 좋아요 행을 먼저 지워보고, 지운 행이 없으면 INSERT ... ON CONFLICT DO NOTHING
+    - like_count 는 실제로 바뀐 행 수만큼 like_count ± 1 로 원자적으로 갱신
+    - 없는 게시글이면 (INSERT 외래키 위반 또는 UPDATE 결과 없음) 404
+    (좋아요 목록을 불러오지 않고, 동시에 눌러도 갱신이 사라지지 않음)
+    like_write_behind 를 켜면 posts 행을 잠그지 않고 Redis 에만 기록합니다.
+    """
+    if settings.like_write_behind:
+        buffered = await buffered_like(post_id, current_user, db)
+        if buffered is not None:
+            return buffered
 
     try:
-        if is_like:
-            like_count = len(post_likes) - 1
-            post.like_count = like_count
-            db.execute(
-                delete(Like).where(
-                    and_(Like.post_id == post.id, Like.user_id == current_user.id)
-                )
+        result = await db.execute(
+            delete(Like).where(
+                and_(Like.post_id == post_id, Like.user_id == current_user.id)
             )
-            liked = False
+        )
+        if result.rowcount:
+            liked, delta = False, -1
         else:
-            like_count = len(post_likes) + 1
-            post.like_count = like_count
-            new_like = Like(user_id=current_user.id, post_id=post.id)
-            db.add(new_like)
-            liked = True
-        db.commit()
-
-        return {"liked": liked, "like_count": like_count}
+            result = await db.execute(
+                insert_like_ignore(db).values(user_id=current_user.id, post_id=post_id)
+            )
+            # 동시에 들어온 같은 사용자의 요청이 먼저 넣었으면 이미 좋아요 상태
+            liked, delta = True, 1 if result.rowcount else 0
 
-    except:
-        db.rollback()
+        result = await db.execute(
+            update(PostModel)
+            .where(PostModel.id == post_id)
+            .values(like_count=func.coalesce(PostModel.like_count, 0) + delta)
+            .returning(PostModel.like_count, PostModel.views, PostModel.created_at)
+            .execution_options(synchronize_session=False)
+        )
+        post = result.first()
+        if post is None:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시글 입니다."
+            )
+        await db.commit()
+    except HTTPException:
+        raise
+    except IntegrityError:
+        # 없는 게시글에 좋아요 INSERT -> 외래키 위반 (postgresql)
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시글 입니다."
+        )
+    except Exception:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="좋아요가 처리되지 않았습니다.",
         )
+
+    await popular_leaderboard.update_many(
+        [(post_id, post.like_count, post.views, post.created_at)]
+    )
+    return {"liked": liked, "like_count": post.like_count}
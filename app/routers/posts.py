@@ -1,17 +1,20 @@
-import json
 import random
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-import httpx
 from pydantic import BaseModel
-from sqlalchemy import and_, func, insert, update
+from sqlalchemy import func, insert, select, update
 from app.redis_client import redis_client
-from app.database import get_db
-from app.models import Book, Post as PostModel, PostTag, Tag, User, UserTagPreference
-from app.schemas import Post, PostCreate, PostUpdate
+from app.leaderboard import popular_leaderboard
+from app.tag_index import tag_index
+from app.tagging import TAG_STATUS_PENDING, tag_worker
+from app.post_loader import select_posts
+from app.post_views import with_live_views
+from app.database import get_async_db
+from app.models import Book, Post as PostModel, PostTag, User
+from app.schemas import Post, PostCreate, PostTagStatus, PostUpdate
 from app.schemas import UserResponse
 from app.security import get_current_user, get_current_user_optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 import logging
 
@@ -23,220 +26,154 @@ logger = logging.getLogger()
 
 
 
-async def make_tags(
-    db: Session, book_title: str, isbn: str, content: str
-) -> List[dict]:
-    """
-    ai로 태그를 생성하는 로직
-    """
-    tags = db.query(Tag).all()
-    tag_list = [{"tag_id": tag.id, "tag_name": tag.name} for tag in tags]
-    message = []
-
-    system_content = f"""
-    당신은 독서 관련 게시글의 태그 생성 ai 입니다.
-    -책 제목
-    -책 isbn 번호
-    -게시글 내용
-    
-    역할 : 위 내용들을 기반한 가장 적합한 태그를 아래의 태그 목록 내에서 겹치지 않게 최소 3개 최대 5개 출력하세요.(3개도 무방하나 가능한 4개이상 추천해 주세요)
-    -태그 목록 {tag_list}
-    
-    응답 형식 : 반드시 다음 json 형식으로만 응답하세요:
-    {{"response": [{{"tag_id": "태그 아이디1", "tag_name": "태그 이름1"}},{{"tag_id": "태그 아이디2", "tag_name": "태그 이름2"}},{{"tag_id": "태그 아이디3", "tag_name": "태그 이름3"}}....]}}
-    """
-    message.append({"role": "system", "content": system_content})
-    message.append(
-        {
-            "role": "user",
-            "content": f"책 제목 : {book_title}, 책 isbn 번호 : {isbn}, 게시글 내용 : {content}",
-        }
-    )
-
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                settings.openai_url,
-                timeout=60.0,
-                json=message,
-            )
-            if resp.status_code != 200:
-                resp.raise_for_status()
-            response_data = resp.json()
-            return_message = response_data["choices"][0]["message"]["content"]
-
-    except:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="태그 생성에 실패하였습니다.",
-        )
-
-    try:
-        parsed_response = json.loads(return_message)
-
-        if "response" not in parsed_response:
-            raise ValueError("응답 형식이 잘못되었습니다.")
-
-        tags = parsed_response["response"]
-
-        if not isinstance(tags, list) or len(tags) < 3 or len(tags) > 5:
-            raise ValueError("태그 갯수가 올바르지 않습니다.")
-
-        for tag in tags:
-            if "tag_id" not in tag or "tag_name" not in tag:
-                raise ValueError("태그 형식이 올바르지 않습니다.")
-        return tags
-
-    except (ValueError, json.JSONDecodeError, KeyError) as e:
-        logger.error(f"AI 응답 검증 실패 : {e}, 응답 내용 :{return_message}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="AI 응답 검증에 실패했습니다.",
-        )
-
-
 @router.get("/{post_id}", response_model=Post)
 async def get_post_detail(
-    post_id: int,request: Request, db: Session = Depends(get_db), current_user: Optional[User] = Depends(get_current_user_optional)
+    post_id: int,request: Request, db: AsyncSession = Depends(get_async_db), current_user: Optional[User] = Depends(get_current_user_optional)
 ):
-    post = db.query(PostModel).filter(PostModel.id == post_id).first()
+    result = await db.execute(
+        select_posts().where(PostModel.id == post_id)
+    )
+    post = result.scalars().first()
 
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시글 입니다."
         )
     client_ip = request.client.host
-    
-    view_key = f'post:{post_id}:viewed:{client_ip}'
-    
-    already_viewed = await redis_client.exists(view_key)
-    
-    if not already_viewed:
-        await redis_client.incr(f"post:{post_id}:views")
-        await redis_client.set(view_key,"1",expire=86400)
-        logger.info(f"새로운 조회:{client_ip}")
-    else:
-        logger.info(f'24시간 내 중복조회:{client_ip}')
 
-    return post
+    # 24시간 내 같은 IP의 중복 조회는 제외 (Redis 1회 호출)
+    await redis_client.record_view(post_id, client_ip, expire=86400)
+
+    return (await with_live_views([post]))[0]
 
 
 @router.get("/{post_id}/related", response_model=List[Post])
-async def get_any_posts(post_id: int, limit: int = 6, db: Session = Depends(get_db), current_user: Optional[User] = Depends(get_current_user_optional)):
+async def get_any_posts(post_id: int, limit: int = 6, db: AsyncSession = Depends(get_async_db), current_user: Optional[User] = Depends(get_current_user_optional)):
     """
     해당 게시글 관련 게시글을 불러오는 엔드 포인트 입니다.
     """
-    post = db.query(PostModel).filter(PostModel.id == post_id).first()
+    result = await db.execute(
+        select_posts().where(PostModel.id == post_id)
+    )
+    post = result.scalars().first()
 
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시글 입니다."
         )
+    if settings.related_posts_backend == "index" and tag_index.loaded:
+        scored = tag_index.related(
+            post.id,
+            limit,
+            exclude_user_id=current_user.id if current_user else None,
+            metric=settings.related_posts_metric,
+        )
+        if scored is not None:
+            post_ids = [related_id for related_id, _ in scored]
+            result = await db.execute(select_posts().where(PostModel.id.in_(post_ids)))
+            posts = {related.id: related for related in result.scalars().all()}
+            for related_id in post_ids:
+                if related_id not in posts:
+                    # 다른 워커에서 지워진 게시글은 다음 재생성 전까지 여기서 정리
+                    tag_index.remove_post(related_id)
+            return await with_live_views(
+                [posts[related_id] for related_id in post_ids if related_id in posts]
+            )
+
     post_tags = [tag.id for tag in post.tags]
     
-    query = db.query(PostModel)
+    query = select_posts(func.count(PostTag.tag_id))
     
     if current_user:
-        query = query.filter(PostModel.user_id != current_user.id)
+        query = query.where(PostModel.user_id != current_user.id)
         
-    related = (
-        query.add_columns(func.count(PostTag.tag_id))
+    result = await db.execute(
+        query
         .join(PostTag)
-        .filter(PostTag.tag_id.in_(post_tags), PostModel.id != post.id)
+        .where(PostTag.tag_id.in_(post_tags), PostModel.id != post.id)
         .group_by(PostModel.id)
         .order_by(func.count(PostTag.tag_id).desc())
         .limit(10)
-        .all()
     )
+    related = result.all()
     related_data = [data for data, count in related]
     related_posts = random.sample(related_data, min(limit, len(related_data)))
-    return related_posts
+    return await with_live_views(related_posts)
 
 
 @router.get("/users/{user_id}", response_model=List[Post])
-async def get_post_by_user(user_id: int, db: Session = Depends(get_db)):
-    posts = db.query(PostModel).filter(PostModel.user_id == user_id).all()
-    return posts
+async def get_post_by_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(
+        select_posts().where(PostModel.user_id == user_id)
+    )
+    posts = result.scalars().all()
+    return await with_live_views(posts)
 
 
 @router.post("/", response_model=Post)
 async def create_post(
     data: PostCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
+    """
+    게시글은 태그 없이(tag_status=pending) 바로 커밋하고, AI 태그 생성은 태그 워커 큐에 등록
+    태그가 붙었는지는 GET /posts/{post_id}/tag-status 로 확인합니다.
+    """
     try:
         new_post = PostModel(
             user_id=current_user.id,
             title=data.title,
             content=data.content,
             isbn=data.isbn,
+            tag_status=TAG_STATUS_PENDING,
         )
         db.add(new_post)
-        if not db.query(Book).filter(Book.isbn == data.isbn).first():
+        result = await db.execute(select(Book).where(Book.isbn == data.isbn))
+        if not result.scalars().first():
             new_book = Book(
                 isbn=data.isbn, title=data.book_title, author=data.book_author
             )
             db.add(new_book)
-
-        db.flush()
-        tags = await make_tags(db, data.book_title, data.isbn, data.content)
-
-
-        new_posttag = [
-            PostTag(post_id=new_post.id, tag_id=tag["tag_id"]) for tag in tags
-        ]
-
-        db.add_all(new_posttag)
-
-        for tag in new_posttag:
-            if (
-                db.query(UserTagPreference)
-                .filter(
-                    and_(
-                        UserTagPreference.user_id == current_user.id,
-                        UserTagPreference.tag_id == tag.tag_id,
-                    )
-                )
-                .first()
-            ):
-                db.execute(
-                    update(UserTagPreference)
-                    .where(
-                        and_(
-                            UserTagPreference.user_id == current_user.id,
-                            UserTagPreference.tag_id == tag.tag_id,
-                        )
-                    )
-                    .values(frequency=UserTagPreference.frequency + 1)
-                )
-            else:
-                new_usertag = UserTagPreference(
-                    user_id=current_user.id, tag_id=tag.tag_id
-                )
-                db.add(new_usertag)
-        db.commit()
-        db.refresh(new_post)
-        return new_post
-    except HTTPException:
-        db.rollback()
-        raise
+        await db.commit()
+        await db.refresh(new_post, attribute_names=["tags"])
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="게시글 작성에 실패했습니다.",
         )
 
+    await tag_worker.enqueue(new_post.id)
+    await popular_leaderboard.update(new_post)
+    return new_post
+
+
+@router.get("/{post_id}/tag-status", response_model=PostTagStatus)
+async def get_post_tag_status(post_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    AI 태그 생성 상태 (pending: 생성 중, done: 완료, failed: 재시도까지 실패)
+    """
+    result = await db.execute(select_posts().where(PostModel.id == post_id))
+    post = result.scalars().first()
+    if not post:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시글 입니다."
+        )
+    return post
+
 
 @router.put("/{post_id}", response_model=Post)
 async def update_post(
     post_id: int,
     updated_post: PostUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    post = db.query(PostModel).filter(PostModel.id == post_id).first()
+    result = await db.execute(
+        select_posts().where(PostModel.id == post_id)
+    )
+    post = result.scalars().first()
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시글 입니다."
@@ -250,18 +187,22 @@ async def update_post(
         post.title = updated_post.title
     if updated_post.content:
         post.content = updated_post.content
-    db.commit()
-    db.refresh(post)
-    return post
+    await db.commit()
+    await db.refresh(post, attribute_names=["tags"])
+    return (await with_live_views([post]))[0]
 
 
 @router.delete("/{post_id}")
 async def delete_post(
     post_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    post = db.query(PostModel).filter(PostModel.id == post_id).first()
+    # 행을 잠가서 조회수 동기화가 이 글의 views 를 올리는 동안에는 기다렸다가 최신 값으로 빼도록
+    result = await db.execute(
+        select(PostModel).where(PostModel.id == post_id).with_for_update()
+    )
+    post = result.scalars().first()
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="존재하지 않는 게시글 입니다."
@@ -272,6 +213,16 @@ async def delete_post(
             status_code=status.HTTP_403_FORBIDDEN, detail="잘못된 접근입니다."
         )
 
-    db.delete(post)
-    db.commit()
+    # 작성자의 total_views 에서 이 글의 조회수를 뺌
+    # (Redis 에 남은 조회수는 sync_views_to_db 가 게시글을 찾지 못해 버리므로 DB 값만 빼면 됨)
+    if post.views:
+        await db.execute(
+            update(User)
+            .where(User.id == post.user_id)
+            .values(total_views=User.total_views - post.views)
+        )
+    await db.delete(post)
+    await db.commit()
+    await popular_leaderboard.remove(post_id)
+    tag_index.remove_post(post_id)
     return
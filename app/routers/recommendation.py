@@ -1,67 +1,122 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends
-from sqlalchemy import and_, func
-from app.database import get_db
-from app.models import PostTag, User, UserTagPreference
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
+from app.leaderboard import SCORE_MODE_RAW, popular_leaderboard, popular_score_mode
+from app.recommender import recommendation_cache, tag_affinity_scores
+from app.models import User
 from app.models import Post as PostModel
 from app.schemas import Post
+from app.pagination import after_cursor, decode_cursor, set_next_cursor
+from app.post_loader import select_posts
+from app.post_views import with_live_views
 from app.security import get_current_user, get_current_user_optional
-from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/recommendation", tags=["recommendation"])
 
 @router.get("/popular", response_model=List[Post])
 async def popular_posts(
+    response: Response,
     page: int = 1,
     limit: int = 9,
+    cursor: Optional[str] = None,
     current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(PostModel)
-    if current_user:
-        query = query.filter(PostModel.user_id != current_user.id)
+    """
+    인기 점수 -> 최신 게시글 순 (페이지가 섞이지 않도록 random 대신 id로 순서 고정)
+    Redis 리더보드에서 읽고, 리더보드를 쓸 수 없으면 DB에서 정렬합니다.
+    cursor 를 주면 키셋 페이지네이션, 다음 커서는 X-Next-Cursor 헤더로 내려갑니다.
+    커서에는 점수 방식이 들어 있어서, 시간 감쇠 점수 커서는 리더보드로만 이어서 읽습니다.
+    """
+    after = decode_cursor(cursor, [float, int, str]) if cursor else None
+    exclude_user_id = current_user.id if current_user else None
+    mode = popular_score_mode()
 
-    posts = (
-        query
-        .order_by(PostModel.like_count.desc(), func.random())
-        .offset(limit * (page - 1))
-        .limit(limit)
-        .all()
-    )
-    return posts
+    rows = None
+    if after is None or after[2] == mode:
+        rows = await popular_leaderboard.read(
+            db,
+            limit,
+            offset=limit * (page - 1),
+            after=tuple(after[:2]) if after else None,
+            exclude_user_id=exclude_user_id,
+        )
+    if rows is None:
+        # DB 정렬은 시간 감쇠 없이 좋아요 수(+ 조회수 가중치) 기준이라 감쇠 점수 커서와 비교할 수 없음
+        if after is not None and after[2] != SCORE_MODE_RAW:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="인기 순위를 지금 이어서 조회할 수 없습니다. 첫 페이지부터 다시 조회해 주세요.",
+            )
+        mode = SCORE_MODE_RAW
+        score = PostModel.like_count
+        if settings.popular_view_weight:
+            score = score + settings.popular_view_weight * func.coalesce(PostModel.views, 0)
+        sort_keys = (score, PostModel.id)
+        query = select_posts(score)
+        if exclude_user_id is not None:
+            query = query.where(PostModel.user_id != exclude_user_id)
+        if after:
+            query = query.where(after_cursor(sort_keys, after[:2]))
+        else:
+            query = query.offset(limit * (page - 1))
+
+        result = await db.execute(
+            query
+            .order_by(*(key.desc() for key in sort_keys))
+            .limit(limit)
+        )
+        rows = result.all()
+
+    set_next_cursor(response, rows, limit, key=lambda row: (float(row[1] or 0), row[0].id, mode))
+    return await with_live_views([row[0] for row in rows])
 
 @router.get("/", response_model=List[Post])
 async def recommend_post(
+    response: Response,
+    background_tasks: BackgroundTasks,
     page: int = 1,
     limit: int = 9,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    subquery = (
-        db.query(
-            PostTag.post_id,
-            func.sum(UserTagPreference.frequency).label("frequency_score"),
-            func.count(PostTag.tag_id).label("match_score"),
-        )
-        .join(UserTagPreference, PostTag.tag_id == UserTagPreference.tag_id)
-        .filter(UserTagPreference.user_id == current_user.id)
-        .group_by(PostTag.post_id)
-        .subquery()
+    """
+    태그 선호도 점수 -> 최신 게시글 순
+    미리 계산해 둔 사용자별 추천 목록에서 읽고, 목록이 없으면 이번에는 DB로 계산하면서
+    응답 후 백그라운드에서 목록을 만듭니다.
+    cursor 를 주면 키셋 페이지네이션, 다음 커서는 X-Next-Cursor 헤더로 내려갑니다.
+    """
+    after = decode_cursor(cursor, [float, int]) if cursor else None
+
+    rows = await recommendation_cache.read(
+        db, current_user.id, limit, offset=limit * (page - 1), after=after
     )
-    posts = (
-        db.query(PostModel)
-        .join(subquery, PostModel.id == subquery.c.post_id)
-        .filter(PostModel.user_id != current_user.id)
-        .order_by(
-            (subquery.c.frequency_score * subquery.c.match_score).desc(),
-            func.random(),
+    if rows is None:
+        background_tasks.add_task(recommendation_cache.build, current_user.id)
+
+        scores = tag_affinity_scores(current_user.id)
+        sort_keys = (scores.c.score, PostModel.id)
+        query = (
+            select_posts(scores.c.score)
+            .join(scores, PostModel.id == scores.c.post_id)
+            .where(PostModel.user_id != current_user.id)
+            .order_by(*(key.desc() for key in sort_keys))
         )
-        .offset(limit * (page - 1))
-        .limit(limit)
-        .all()
-    )
+        if after:
+            query = query.where(after_cursor(sort_keys, after))
+        else:
+            query = query.offset(limit * (page - 1))
+
+        result = await db.execute(query.limit(limit))
+        rows = result.all()
+
+    set_next_cursor(response, rows, limit, key=lambda row: (float(row[1]), row[0].id))
 
-    return posts
+    return await with_live_views([row[0] for row in rows])
 
 
 
@@ -1,51 +1,132 @@
+from datetime import datetime
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from app.database import get_db
-from app.models import Post, Book, Tag, User
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy import column, func, literal_column, or_, select, table, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, selectinload
+from app.config import settings
+from app.database import get_async_db
+from app.models import Post, Book, PostTag, Tag, User
+from app.pagination import after_cursor, decode_cursor, set_next_cursor
 from app.schemas import SearchResult
+from app.tag_catalog import tag_catalog
 from app.security import get_current_user_optional
 
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
+# sqlite FTS5 인덱스 (alembic 마이그레이션에서 생성, 트리거로 posts와 동기화)
+posts_fts = table("posts_fts", column("rowid"), column("title"), column("content"))
+
+
+def fulltext_matches(q: str, dialect: str):
+    '''
+    게시글 제목/내용 전문 검색 결과 서브쿼리 (post_id, score), score가 클수록 관련도가 높음
+    - postgresql: tsvector(GIN) 단어 검색 + pg_trgm(GIN) 부분 일치
+    - sqlite: FTS5 trigram (3글자 미만이면 인덱스를 쓸 수 없으므로 None)
+    '''
+    if dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery("simple", q)
+        search_vector = literal_column("posts.search_vector")
+        return (
+            select(
+                Post.id.label("post_id"),
+                func.ts_rank_cd(search_vector, ts_query).label("score"),
+            )
+            .where(
+                or_(
+                    search_vector.op("@@")(ts_query),
+                    Post.title.ilike(f"%{q}%"),
+                    Post.content.ilike(f"%{q}%"),
+                )
+            )
+            .subquery()
+        )
+    if dialect == "sqlite" and len(q) >= 3:
+        phrase = '"' + q.replace('"', '""') + '"'
+        return (
+            select(
+                posts_fts.c.rowid.label("post_id"),
+                (-func.bm25(literal_column("posts_fts"))).label("score"),
+            )
+            .select_from(posts_fts)
+            .where(literal_column("posts_fts").op("MATCH")(phrase))
+            .subquery()
+        )
+    return None
+
 @router.get("/", response_model=list[SearchResult])
-def search(
+async def search(
+    response: Response,
     q: str = "",
     tags: list[str] = Query(default=[]), # 최대 3개 선택
     page: int = 1,
+    cursor: Optional[str] = None,
     current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Post).join(Book).outerjoin(Post.tags)
+    # 태그는 조인하지 않고 EXISTS로 거름 (게시글이 태그 수만큼 중복되지 않도록)
+    # 책은 조인한 행에서 바로 채우고, 태그는 페이지 단위로 한 번에 로딩
+    query = (
+        select(Post)
+        .join(Book)
+        .options(contains_eager(Post.book), selectinload(Post.tags))
+    )
 
     # 로그인한 경우 자기 게시글 제외
     if current_user:
-        query = query.filter(Post.user_id != current_user.id)
+        query = query.where(Post.user_id != current_user.id)
+
+    matches = None
+    if q and settings.search_backend == "fulltext":
+        matches = fulltext_matches(q, db.bind.dialect.name)
 
     # 통합 검색: q가 있으면 모든 곳에서 검색
-    if q:
+    if matches is not None:
+        # 전문 검색 인덱스로 찾은 게시글 + 책 제목/ISBN/태그 이름으로 찾은 게시글
+        candidate_ids = union(
+            select(matches.c.post_id),
+            select(Post.id)
+            .join(Book)
+            .where(or_(Book.title.ilike(f"%{q}%"), Book.isbn.ilike(f"%{q}%"))),
+            select(PostTag.post_id).join(Tag).where(Tag.name.ilike(f"%{q}%")),
+        )
+        query = query.outerjoin(matches, matches.c.post_id == Post.id).where(
+            Post.id.in_(candidate_ids)
+        )
+    elif q:
         search_conditions = [
             Post.title.ilike(f"%{q}%"),      # 게시글 제목
             Post.content.ilike(f"%{q}%"),    # 게시글 내용
             Book.title.ilike(f"%{q}%"),      # 책 제목
             Book.isbn.ilike(f"%{q}%"),       # ISBN (부분 일치)
-            Tag.name.ilike(f"%{q}%")         # 태그 이름
+            Post.tags.any(Tag.name.ilike(f"%{q}%"))  # 태그 이름
         ]
-        query = query.filter(or_(*search_conditions))
+        query = query.where(or_(*search_conditions))
         
     # 태그 필터 (추가 필터링)
     if tags:
-        query = query.filter(Tag.name.in_(tags))
+        query = query.where(Post.tags.any(Tag.name.in_(tags)))
 
-    # 최신순 정렬
-    query = query.order_by(Post.created_at.desc())
+    # 관련도순(전문 검색) -> 최신순 정렬, 같은 값이면 id로 순서 고정
+    if matches is not None:
+        sort_keys = (func.coalesce(matches.c.score, 0), Post.created_at, Post.id)
+        cursor_types = [float, datetime, int]
+    else:
+        sort_keys = (Post.created_at, Post.id)
+        cursor_types = [datetime, int]
+    query = query.add_columns(*sort_keys).order_by(*(key.desc() for key in sort_keys))
 
-    # 페이지네이션
+    # 페이지네이션 (cursor 가 있으면 키셋, 없으면 page)
     page_size = 10
-    results = query.offset(
-        (page - 1) * page_size).limit(page_size).all()
+    if cursor:
+        query = query.where(after_cursor(sort_keys, decode_cursor(cursor, cursor_types)))
+    else:
+        query = query.offset((page - 1) * page_size)
+    result = await db.execute(query.limit(page_size))
+    rows = result.all()
+    set_next_cursor(response, rows, page_size, key=lambda row: tuple(row[1:]))
+    results = [row[0] for row in rows]
     
     return [
         SearchResult(
@@ -61,7 +142,17 @@ def search(
 
 
 @router.get("/tags")
-async def get_all_tags(db: Session = Depends(get_db)):
-    
-    tags = db.query(Tag).all()
-    return [tag.name for tag in tags]
\ No newline at end of file
+async def get_all_tags(
+    request: Request, response: Response, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    태그 이름 목록 (프로세스 캐시, ETag 는 태그 목록 버전이라 바뀌지 않았으면 304)
+    """
+    tags = await tag_catalog.get(db)
+    etag = f'"{tag_catalog.version}"'
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (value.strip().removeprefix("W/") for value in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return [tag["tag_name"] for tag in tags]
\ No newline at end of file
@@ -1,8 +1,26 @@
 import logging
-from sqlalchemy import update
-from sqlalchemy.orm import selectinload
-from app.models import Post, User
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import (
+    Integer,
+    bindparam,
+    column as sa_column,
+    delete,
+    func,
+    insert,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from app.config import settings
+from app.leader import LeaderElection, leader_only
+from app.leaderboard import popular_leaderboard
+from app.local_tagger import local_tagger
+from app.models import Like, Post, User
 from app.redis_client import redis_client
+from app.tag_index import tag_index
+from app.tagging import tag_worker
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
@@ -10,65 +28,292 @@ logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
-async def sync_views_to_db():
-    from app.database import SessionLocal
+# 한 번에 Redis에서 꺼내서 DB에 반영할 게시글 수
+VIEW_SYNC_BATCH_SIZE = 1000
+LIKE_FLUSH_BATCH_SIZE = 100
+_legacy_view_keys_marked = False
 
-    logger.info("조회수 동기화 시작")
+# 워커/레플리카가 여러 개여도 동기화 작업은 리더 하나만 실행
+scheduler_leader = LeaderElection("sync", lease_seconds=settings.scheduler_leader_lease_seconds)
 
-    try:
-        keys = await redis_client.redis.keys("post:*:views")
-        db = SessionLocal()
-        for key in keys:
-            post_id = int(key.split(":")[1])
-            increment_views = await redis_client.getset(key)
+async def bulk_increment(db, column, deltas: Dict[int, int]):
+    """
+    {id: 증가량} 을 UPDATE 한 번으로 반영
+    - postgresql: UPDATE ... FROM (VALUES ...)
+    - 그 외(sqlite): 같은 UPDATE 문을 executemany 로 실행
+    """
+    table = column.table
+    if db.bind.dialect.name == "postgresql":
+        delta_values = values(
+            sa_column("id", Integer), sa_column("delta", Integer), name="deltas"
+        ).data(list(deltas.items()))
+        await db.execute(
+            update(table)
+            .where(table.c.id == delta_values.c.id)
+            .values({column.name: func.coalesce(column, 0) + delta_values.c.delta})
+        )
+    else:
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("target_id"))
+            .values({column.name: func.coalesce(column, 0) + bindparam("delta")}),
+            [{"target_id": key, "delta": delta} for key, delta in deltas.items()],
+        )
+
+
+async def apply_like_ops(db, ops: Dict[int, Dict[int, bool]]) -> Dict[int, int]:
+    """
+    Redis 에 쌓인 좋아요 토글 {post_id: {user_id: 좋아요 여부}} 를 likes 테이블에 반영하고
+    실제로 바뀐 행 수만큼 Post.like_count 를 증감
+    (그 사이 지워진 게시글/사용자의 토글은 버림)
+    """
+    user_ids = {user_id for user_ops in ops.values() for user_id in user_ops}
+    result = await db.execute(select(Post.id).where(Post.id.in_(ops.keys())))
+    post_ids = set(result.scalars().all())
+    result = await db.execute(select(User.id).where(User.id.in_(user_ids)))
+    user_ids = set(result.scalars().all())
+    pairs = [
+        (post_id, user_id)
+        for post_id, user_ops in ops.items()
+        if post_id in post_ids
+        for user_id in user_ops
+        if user_id in user_ids
+    ]
+    if not pairs:
+        return {}
+
+    result = await db.execute(
+        select(Like.post_id, Like.user_id).where(tuple_(Like.post_id, Like.user_id).in_(pairs))
+    )
+    existing = set(result.all())
+    to_insert = [pair for pair in pairs if ops[pair[0]][pair[1]] and pair not in existing]
+    to_delete = [pair for pair in pairs if not ops[pair[0]][pair[1]] and pair in existing]
+
+    if to_insert:
+        await db.execute(
+            insert(Like), [{"post_id": post_id, "user_id": user_id} for post_id, user_id in to_insert]
+        )
+    if to_delete:
+        await db.execute(delete(Like).where(tuple_(Like.post_id, Like.user_id).in_(to_delete)))
+
+    deltas: Dict[int, int] = {}
+    for post_id, _ in to_insert:
+        deltas[post_id] = deltas.get(post_id, 0) + 1
+    for post_id, _ in to_delete:
+        deltas[post_id] = deltas.get(post_id, 0) - 1
+    deltas = {post_id: delta for post_id, delta in deltas.items() if delta}
+    if deltas:
+        await bulk_increment(db, Post.like_count, deltas)
+    return deltas
+
+
+async def flush_buffered_likes(leader: Optional[LeaderElection] = None):
+    """
+    write-behind 좋아요를 배치 단위로 DB에 반영
+    leader 를 넘기면 배치마다 커밋 전에 같은 트랜잭션에서 펜싱 토큰을 확인 (LeaderElection.fence)
+    """
+    from app.database import session_scope
 
-            if increment_views == 0:
+    flushed = 0
+    async with session_scope("flush_likes") as db:
+        while True:
+            ops = await redis_client.drain_like_ops(LIKE_FLUSH_BATCH_SIZE)
+            if ops is None:
+                break
+            if not ops:
                 continue
+            try:
+                deltas = await apply_like_ops(db, ops)
+                rows = []
+                if deltas:
+                    result = await db.execute(
+                        select(Post.id, Post.like_count, Post.views, Post.created_at)
+                        .where(Post.id.in_(deltas.keys()))
+                    )
+                    rows = result.all()
+                if leader is not None and not await leader.fence(db):
+                    raise RuntimeError("리더 임대가 만료되어 반영을 취소합니다.")
+                await db.commit()
+                flushed += len(ops)
+            except Exception as e:
+                await db.rollback()
+                await redis_client.restore_like_ops(ops.keys())
+                logger.error(f"좋아요 db 반영 실패: {e}")
+                break
+            await redis_client.clear_inflight_likes(ops.keys())
+            await popular_leaderboard.update_many(rows)
+    if flushed:
+        logger.info(f"좋아요 반영 완료: 게시글 {flushed}개")
 
-            result = db.execute(
-                update(Post)
-                .where(Post.id == post_id)
-                .values(views=Post.views + increment_views)
-            )
-            db.commit()
-    except Exception as e:
-        logger.error(f"조회수 db 동기화 실패: {e}")
-    finally:
-        db.close()
+
+async def sync_views_to_db(leader: Optional[LeaderElection] = None):
+    """
+    leader 를 넘기면 배치마다 커밋 전에 같은 트랜잭션에서 펜싱 토큰을 확인 (LeaderElection.fence)
+    """
+    from app.database import session_scope
+    global _legacy_view_keys_marked
+
+    logger.info("조회수 동기화 시작")
+
+    if not _legacy_view_keys_marked:
+        # dirty 셋 도입 전에 쌓인 조회수 키는 처음 한 번만 SCAN으로 등록
+        await redis_client.mark_dirty_views()
+        _legacy_view_keys_marked = True
+
+    synced = 0
+    async with session_scope("sync_views") as db:
+        while True:
+            deltas = await redis_client.drain_view_deltas(VIEW_SYNC_BATCH_SIZE)
+            if deltas is None:
+                break
+            if not deltas:
+                continue
+            try:
+                await bulk_increment(db, Post.views, deltas)
+                # 같은 증가량을 작성자별로 모아서 User.total_views 에도 반영
+                result = await db.execute(
+                    select(
+                        Post.id, Post.user_id, Post.like_count, Post.views, Post.created_at
+                    ).where(Post.id.in_(deltas.keys()))
+                )
+                rows = result.all()
+                user_deltas: Dict[int, int] = {}
+                for post_id, user_id, *_ in rows:
+                    if user_id is not None:
+                        user_deltas[user_id] = user_deltas.get(user_id, 0) + deltas[post_id]
+                if user_deltas:
+                    await bulk_increment(db, User.total_views, user_deltas)
+                if leader is not None and not await leader.fence(db):
+                    raise RuntimeError("리더 임대가 만료되어 반영을 취소합니다.")
+                await db.commit()
+                synced += len(deltas)
+                if settings.popular_view_weight:
+                    # 조회수가 인기 점수에 들어가면 반영된 게시글의 점수도 갱신
+                    await popular_leaderboard.update_many(
+                        (post_id, like_count, views, created_at)
+                        for post_id, _, like_count, views, created_at in rows
+                    )
+            except Exception as e:
+                await db.rollback()
+                await redis_client.restore_view_deltas(deltas)
+                logger.error(f"조회수 db 동기화 실패: {e}")
+                break
+    logger.info(f"조회수 동기화 완료: 게시글 {synced}개")
 
 async def sync_user_totalviews_to_db():
-    from app.database import SessionLocal
-    logger.info("User total views 동기화 시작")
+    """
+    User.total_views 전체 재계산 (보정용)
+    평소에는 sync_views_to_db 에서 증가분으로 갱신하므로, 어긋났을 때만 맞추는 용도입니다.
+    """
+    from app.database import session_scope
+    logger.info("User total views 보정 시작")
     try:
-        db = SessionLocal()
-        users = db.query(User).options(selectinload(User.posts)).all()
-        for user in users:
-            total_views = sum(post.views for post in user.posts)
-            user.total_views = total_views
-        db.commit()
+        async with session_scope("sync_user_total_views") as db:
+            total_views = (
+                select(func.coalesce(func.sum(Post.views), 0))
+                .where(Post.user_id == User.id)
+                .scalar_subquery()
+            )
+            await db.execute(update(User).values(total_views=total_views))
+            await db.commit()
     except Exception as e:
         logger.error(f"User total views 동기화 실패:{e}")
-    finally:
-        db.close()
         
+async def rebuild_popular_leaderboard():
+    """
+    인기 게시글 리더보드를 DB 기준으로 다시 만듦
+    (Redis 가 비워졌거나 좋아요/조회수 갱신을 놓친 경우를 보정)
+    """
+    from app.database import session_scope
+    async with session_scope("rebuild_popular_leaderboard") as db:
+        await popular_leaderboard.rebuild(db)
+
+async def requeue_stuck_tagging():
+    """
+    큐에서 빠진 채 pending 으로 남은 게시글의 태그 작업을 다시 등록
+    """
+    from app.database import session_scope
+    try:
+        async with session_scope("requeue_stuck_tagging") as db:
+            await tag_worker.requeue_stuck(db)
+    except Exception as e:
+        logger.error(f"태그 작업 재등록 실패: {e}")
+
 def start_scheduler():
     scheduler.add_job(
-        sync_views_to_db,
+        scheduler_leader.acquire_or_renew,
+        trigger=IntervalTrigger(seconds=max(settings.scheduler_leader_lease_seconds // 3, 1)),
+        id="leader_lease",
+        name="스케줄러 리더 임대 갱신",
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+    scheduler.add_job(
+        leader_only(scheduler_leader)(sync_views_to_db),
         trigger=IntervalTrigger(minutes=5),
+        kwargs={"leader": scheduler_leader},
         id="sync_views",
         name = "Redis to DB 동기화",
         replace_existing=True
     )
+    # write-behind 를 끈 뒤에도 남은 토글이 반영되도록 항상 등록 (쌓인 게 없으면 SPOP 한 번)
+    scheduler.add_job(
+        leader_only(scheduler_leader)(flush_buffered_likes),
+        trigger=IntervalTrigger(seconds=settings.like_flush_seconds),
+        kwargs={"leader": scheduler_leader},
+        id="flush_likes",
+        name="좋아요 Redis to DB 반영",
+        replace_existing=True
+    )
     scheduler.add_job(
-        sync_user_totalviews_to_db,
-        trigger=IntervalTrigger(hours=1),
-        id="syncUser_total_veiw",
-        name="User total views DB 동기화",
+        leader_only(scheduler_leader)(rebuild_popular_leaderboard),
+        trigger=IntervalTrigger(minutes=settings.popular_rebuild_minutes),
+        id="rebuild_popular_leaderboard",
+        name="인기 게시글 리더보드 재생성",
+        next_run_time=datetime.now(),
         replace_existing=True
     )
+    scheduler.add_job(
+        leader_only(scheduler_leader)(requeue_stuck_tagging),
+        trigger=IntervalTrigger(minutes=settings.tagging_requeue_minutes),
+        id="requeue_stuck_tagging",
+        name="멈춘 태그 작업 재등록",
+        replace_existing=True
+    )
+    # 관련 게시글 인덱스는 워커 메모리에 있으므로 리더가 아니어도 워커마다 실행
+    scheduler.add_job(
+        tag_index.refresh,
+        trigger=IntervalTrigger(seconds=settings.related_index_refresh_seconds),
+        id="refresh_related_index",
+        name="관련 게시글 인덱스 갱신",
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+    # 로컬 태그 분류기도 워커 메모리에 있으므로 워커마다 학습
+    if settings.local_tagger_mode != "off":
+        scheduler.add_job(
+            local_tagger.refresh,
+            trigger=IntervalTrigger(minutes=settings.local_tagger_retrain_minutes),
+            id="train_local_tagger",
+            name="로컬 태그 분류기 학습",
+            next_run_time=datetime.now(),
+            replace_existing=True
+        )
+    if settings.user_total_views_reconcile_hours > 0:
+        scheduler.add_job(
+            leader_only(scheduler_leader)(sync_user_totalviews_to_db),
+            trigger=IntervalTrigger(hours=settings.user_total_views_reconcile_hours),
+            id="syncUser_total_veiw",
+            name="User total views DB 보정",
+            replace_existing=True
+        )
     scheduler.start()
-    logger.info("스케줄러 작업실행 \n 레디스 조회수 동기화: 5분간격 \n 유저 종합 조회수 동기화 : 60분 간격")
+    logger.info("스케줄러 작업실행 \n 레디스 조회수 + 유저 종합 조회수 동기화: 5분간격")
     
 def stop_scheduler():
     scheduler.shutdown()
-    logger.info("스케줄러 종료")
\ No newline at end of file
+    logger.info("스케줄러 종료")
+
+
+async def release_leadership():
+    await scheduler_leader.release()
\ No newline at end of file
@@ -208,10 +208,19 @@ class Post(BaseModel):
     like_count : int
     created_at : datetime.datetime
     tags : List[TagResponse]
+    tag_status : str = "done"
     
     model_config = ConfigDict(from_attributes=True)
 
 
+class PostTagStatus(BaseModel):
+    id: int
+    tag_status : str
+    tags : List[TagResponse]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class SearchResult(BaseModel):
     post_id: int
     title: str
@@ -6,11 +6,14 @@ from typing import Optional
 from jose import jwt, JWTError, ExpiredSignatureError
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User as UserModel
+from app.user_cache import user_cache
 
 # JWT 설정값
 SECRET_KEY = settings.jwt_secret
@@ -52,14 +55,34 @@ def decode_access_token(token: str) -> dict:
     except JWTError:
         raise ValueError("유효하지 않은 토큰입니다.")
 
+# 사용자 조회 (캐시 우선)
+async def load_user(db: AsyncSession, user_id: int) -> Optional[UserModel]:
+    cached = await user_cache.get(user_id)
+    if cached is not None:
+        # 캐시 값을 세션에 붙여서 수정/삭제도 그대로 가능하게 함 (SELECT 없음)
+        user = UserModel(**cached)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    result = await db.execute(select(UserModel).where(UserModel.id == user_id))
+    user = result.scalars().first()
+    if user:
+        await user_cache.set(user)
+    return user
+
+# 비밀번호 해시 조회 (인증 캐시에는 넣지 않으므로 비밀번호를 확인할 때마다 DB 에서 읽음)
+async def load_password_hash(db: AsyncSession, user_id: int) -> Optional[str]:
+    result = await db.execute(select(UserModel.password_hash).where(UserModel.id == user_id))
+    return result.scalars().first()
+
 # 인증 의존성 설정
 security = HTTPBearer() # 로그인 필수용
 security_optional = HTTPBearer(auto_error=False) # 로그인 선택용
 
 # 현재 사용자 정보 추출(로그인 필수)
-def get_current_user(
+async def get_current_user(
         credentials: HTTPAuthorizationCredentials = Depends(security),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> UserModel:
     token = credentials.credentials
     try:
@@ -69,15 +92,15 @@ def get_current_user(
         raise HTTPException(status_code=401, detail=str(e))
 
     # 사용자 조회
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    user = await load_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
     
     return user
 # 현재 사용자 정보 추출(로그인 선택)
-def get_current_user_optional(
+async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security_optional),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) ->Optional[UserModel]:
     """
     로그인이 선택적인 엔드포인트에서 사용
@@ -95,7 +118,7 @@ def get_current_user_optional(
         user_id = int(payload["sub"])
 
         # 사용자 조회
-        user = db.query(UserModel).filter(UserModel.id == user_id).first()    
+        user = await load_user(db, user_id)
         return user
     
     except (ValueError, KeyError):
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional
+from sqlalchemy import select
+from app.config import settings
+from app.models import Tag
+from app.redis_client import redis_client
+from app.tag_result_cache import catalog_version
+
+logger = logging.getLogger(__name__)
+
+# 태그 목록이 바뀌었을 때 모든 워커에 알리는 채널 (메시지 내용은 쓰지 않음)
+TAG_CATALOG_CHANNEL = "tags:catalog:changed"
+
+
+class TagCatalog:
+    '''
+    태그 목록 프로세스 캐시
+    - 처음 조회할 때 DB 에서 한 번 읽고 이후에는 메모리에서 반환합니다. (AI 태그 생성 프롬프트, /search/tags)
+    - 버전은 태그 목록의 해시라서 워커끼리 같은 목록이면 같은 버전이고, /search/tags 의 ETag 로 씁니다.
+    - 태그를 바꾼 쪽이 invalidate() 하면 Redis pub/sub 으로 모든 워커가 다음 조회 때 다시 읽습니다.
+    - pub/sub 메시지는 놓칠 수 있으므로 tag_catalog_ttl 이 지나도 다시 읽습니다.
+    '''
+    def __init__(self):
+        self._tags: Optional[List[dict]] = None
+        self.version: Optional[str] = None
+        self.loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+
+    def _fresh(self) -> bool:
+        return (
+            self._tags is not None
+            and time.monotonic() - self.loaded_at < settings.tag_catalog_ttl
+        )
+
+    async def get(self, db) -> List[dict]:
+        '''
+        [{"tag_id", "tag_name"}] 태그 목록 (캐시가 비었거나 오래됐으면 DB 에서 다시 읽음)
+        '''
+        if self._fresh():
+            return self._tags
+        async with self._lock:
+            if not self._fresh():
+                await self.load(db)
+        return self._tags
+
+    async def load(self, db):
+        result = await db.execute(select(Tag.id, Tag.name).order_by(Tag.id))
+        tags = [{"tag_id": tag_id, "tag_name": name} for tag_id, name in result.all()]
+        self._tags = tags
+        self.version = catalog_version(tags)
+        self.loaded_at = time.monotonic()
+
+    def expire(self):
+        self._tags = None
+
+    async def invalidate(self):
+        '''
+        태그를 추가/수정/삭제한 뒤 호출 - 이 워커와 다른 워커의 캐시를 모두 비움
+        '''
+        self.expire()
+        try:
+            await redis_client.redis.publish(TAG_CATALOG_CHANNEL, "changed")
+        except Exception as e:
+            logger.error(f"태그 목록 변경 알림 오류: {e}")
+
+    def start(self):
+        self._listener = asyncio.create_task(
+            redis_client.subscribe(
+                TAG_CATALOG_CHANNEL, lambda _: self.expire(), on_reset=self.expire
+            )
+        )
+
+    async def stop(self):
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        await asyncio.gather(self._listener, return_exceptions=True)
+        self._listener = None
+
+
+tag_catalog = TagCatalog()
@@ -0,0 +1,224 @@
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import or_, select
+from app.config import settings
+from app.models import Post as PostModel, PostTag
+from app.tagging import TAG_STATUS_PENDING
+
+logger = logging.getLogger(__name__)
+
+
+class TagIndex:
+    '''
+    게시글 x 태그 희소 행렬을 태그별 행 번호 목록(CSC 열)으로 메모리에 들고 있는 관련 게시글 인덱스
+    - 관련 게시글 점수는 겹치는 태그 수를 np.bincount 한 번으로 세서 cosine / jaccard 로 계산합니다.
+    - 새 게시글은 행을 뒤에 붙이고, 지운 게시글은 행을 비활성화만 합니다. (비활성 행이 많아지면 압축)
+    - 워커마다 따로 존재하므로 스케줄러가 주기적으로 새 게시글을 가져오고 전체를 다시 만듭니다.
+    '''
+    def __init__(self):
+        self._reset()
+        self.loaded = False
+        self.loaded_at = 0.0
+
+    def _reset(self):
+        self._row_of: Dict[int, int] = {}
+        self._post_ids = np.zeros(0, dtype=np.int64)
+        self._authors = np.zeros(0, dtype=np.int64)
+        self._sizes = np.zeros(0, dtype=np.int32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._tags_of: List[Tuple[int, ...]] = []
+        self._postings: Dict[int, List[int]] = {}
+        self._posting_arrays: Dict[int, np.ndarray] = {}
+        self._rows = 0
+        self._dead = 0
+        # DB 에서 가져온 마지막 게시글 id (이 워커에서 직접 추가한 게시글은 포함하지 않음)
+        self.synced_post_id = 0
+        # synced_post_id 이하인데 아직 태그를 만드는 중이라 넣지 않은 게시글 (갱신 때마다 다시 확인)
+        self.pending_post_ids: Set[int] = set()
+
+    def __len__(self) -> int:
+        return self._rows - self._dead
+
+    def _grow(self, rows: int):
+        capacity = len(self._post_ids)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 1024)
+        for name in ("_post_ids", "_authors", "_sizes", "_alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def add_post(self, post_id: int, author_id: Optional[int], tag_ids: Iterable[int]):
+        '''
+        게시글 추가 (이미 있으면 태그를 바꾼 새 행으로 교체)
+        '''
+        self.remove_post(post_id)
+        tags = tuple(sorted(set(tag_ids)))
+        row = self._rows
+        self._grow(row + 1)
+        self._post_ids[row] = post_id
+        self._authors[row] = author_id if author_id is not None else -1
+        self._sizes[row] = len(tags)
+        self._alive[row] = True
+        self._tags_of.append(tags)
+        for tag_id in tags:
+            self._postings.setdefault(tag_id, []).append(row)
+            self._posting_arrays.pop(tag_id, None)
+        self._row_of[post_id] = row
+        self._rows += 1
+
+    def remove_post(self, post_id: int):
+        self.pending_post_ids.discard(post_id)
+        row = self._row_of.pop(post_id, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        self._dead += 1
+        if self._dead > 1024 and self._dead * 2 > self._rows:
+            self._compact()
+
+    def _compact(self):
+        '''
+        비활성 행을 빼고 다시 만듦
+        '''
+        alive = [
+            (int(self._post_ids[row]), int(self._authors[row]), self._tags_of[row])
+            for row in range(self._rows)
+            if self._alive[row]
+        ]
+        synced_post_id, pending_post_ids = self.synced_post_id, self.pending_post_ids
+        self._reset()
+        for post_id, author_id, tags in alive:
+            self.add_post(post_id, author_id if author_id >= 0 else None, tags)
+        self.synced_post_id, self.pending_post_ids = synced_post_id, pending_post_ids
+
+    def _posting(self, tag_id: int) -> np.ndarray:
+        array = self._posting_arrays.get(tag_id)
+        if array is None:
+            array = np.asarray(self._postings.get(tag_id, ()), dtype=np.int64)
+            self._posting_arrays[tag_id] = array
+        return array
+
+    def related(
+        self,
+        post_id: int,
+        limit: int,
+        exclude_user_id: Optional[int] = None,
+        metric: str = "cosine",
+    ) -> Optional[List[Tuple[int, float]]]:
+        '''
+        태그가 비슷한 게시글 상위 limit 개 (post_id, 점수), 점수가 같으면 최신 게시글(id) 우선
+        인덱스에 없는 게시글이면 None
+        '''
+        row = self._row_of.get(post_id)
+        if row is None:
+            return None
+        tags = self._tags_of[row]
+        if not tags or limit <= 0:
+            return []
+
+        rows = np.concatenate([self._posting(tag_id) for tag_id in tags])
+        overlap = np.bincount(rows, minlength=self._rows)
+        candidates = np.flatnonzero(overlap)
+        mask = self._alive[candidates] & (candidates != row)
+        if exclude_user_id is not None:
+            mask &= self._authors[candidates] != exclude_user_id
+        candidates = candidates[mask]
+        if not len(candidates):
+            return []
+
+        inter = overlap[candidates].astype(np.float64)
+        sizes = self._sizes[candidates].astype(np.float64)
+        if metric == "jaccard":
+            scores = inter / (len(tags) + sizes - inter)
+        else:
+            scores = inter / np.sqrt(len(tags) * sizes)
+
+        # 상위 limit 개의 경계 점수 이상만 남겨서 정렬 (경계에서 같은 점수도 id 순으로 고정)
+        if len(candidates) > limit:
+            threshold = np.partition(scores, -limit)[-limit]
+            keep = scores >= threshold
+            candidates, scores = candidates[keep], scores[keep]
+        post_ids = self._post_ids[candidates]
+        order = np.lexsort((-post_ids, -scores))[:limit]
+        return [(int(post_ids[i]), float(scores[i])) for i in order]
+
+    async def load(self, db):
+        '''
+        DB 에서 전체 인덱스를 다시 만듦
+        '''
+        result = await db.execute(
+            select(PostModel.id, PostModel.user_id, PostModel.tag_status, PostTag.tag_id)
+            .outerjoin(PostTag, PostTag.post_id == PostModel.id)
+            .order_by(PostModel.id)
+        )
+        index = TagIndex()
+        index._add_rows(result.all())
+        self.__dict__.update(index.__dict__)
+        self.loaded = True
+        self.loaded_at = time.monotonic()
+        logger.info(f"관련 게시글 인덱스 생성: 게시글 {len(self)}개")
+
+    async def load_new(self, db):
+        '''
+        마지막으로 가져온 게시글 이후의 새 게시글과 태그를 기다리던 게시글만 추가
+        (다른 워커에서 쓴 게시글은 여기서 반영되고, 이미 있는 게시글은 새 행으로 교체)
+        '''
+        condition = PostModel.id > self.synced_post_id
+        waiting = set(self.pending_post_ids)
+        if waiting:
+            condition = or_(condition, PostModel.id.in_(waiting))
+        result = await db.execute(
+            select(PostModel.id, PostModel.user_id, PostModel.tag_status, PostTag.tag_id)
+            .outerjoin(PostTag, PostTag.post_id == PostModel.id)
+            .where(condition)
+            .order_by(PostModel.id)
+        )
+        seen = self._add_rows(result.all())
+        # 기다리던 중에 지워진 게시글
+        self.pending_post_ids -= waiting - seen
+
+    def _add_rows(self, rows) -> Set[int]:
+        '''
+        (post_id, user_id, tag_status, tag_id) 행들을 게시글 단위로 모아서 추가하고 읽은 게시글 id 반환
+        아직 태그를 만드는 중인 게시글은 pending_post_ids 에 넣어두고 다음 갱신 때 그 게시글만 다시 읽음
+        '''
+        posts = []
+        for post_id, user_id, tag_status, tag_id in rows:
+            if not posts or posts[-1][0] != post_id:
+                posts.append((post_id, user_id, tag_status, []))
+            if tag_id is not None:
+                posts[-1][3].append(tag_id)
+
+        for post_id, user_id, tag_status, tags in posts:
+            if tag_status == TAG_STATUS_PENDING:
+                self.pending_post_ids.add(post_id)
+            else:
+                self.add_post(post_id, user_id, tags)
+            self.synced_post_id = max(self.synced_post_id, post_id)
+        return {post_id for post_id, *_ in posts}
+
+    async def refresh(self):
+        '''
+        스케줄러 작업: 처음이거나 related_index_rebuild_minutes 가 지났으면 전체 재생성,
+        아니면 새 게시글만 추가
+        '''
+        from app.database import session_scope
+        try:
+            async with session_scope("related_index_refresh") as db:
+                if (
+                    not self.loaded
+                    or time.monotonic() - self.loaded_at > settings.related_index_rebuild_minutes * 60
+                ):
+                    await self.load(db)
+                else:
+                    await self.load_new(db)
+        except Exception as e:
+            logger.error(f"관련 게시글 인덱스 갱신 오류: {e}")
+
+
+tag_index = TagIndex()
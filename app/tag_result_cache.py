@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import unicodedata
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.config import settings
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+TAG_RESULT_KEY_PREFIX = "tagging:result:"
+
+
+def normalize_content(content: str) -> str:
+    '''
+    캐시 키용 본문 정규화 (유니코드 NFKC, 대소문자, 공백 차이는 같은 본문으로 봄)
+    '''
+    content = unicodedata.normalize("NFKC", content or "").casefold()
+    return re.sub(r"\s+", " ", content).strip()
+
+
+def catalog_version(tag_list: List[dict]) -> str:
+    '''
+    태그 목록 버전 (태그가 추가/변경되면 키가 바뀌어서 이전 결과를 쓰지 않음)
+    '''
+    catalog = sorted((str(tag["tag_id"]), tag["tag_name"]) for tag in tag_list)
+    data = json.dumps(catalog, ensure_ascii=False)
+    return hashlib.sha256(data.encode()).hexdigest()[:16]
+
+
+class TagResultCache:
+    '''
+    AI 태그 생성 결과 캐시 (내용 주소 방식)
+    - 키는 (isbn, 정규화한 본문, 태그 목록 버전) 의 해시라서 같은 책의 같은 글을 다시 쓰거나
+      재시도할 때 LLM 을 다시 호출하지 않습니다. 결과는 Redis 에 tag_result_cache_ttl 동안 저장합니다.
+    - 같은 키로 동시에 들어온 요청은 이 프로세스 안에서 LLM 호출 하나를 같이 기다립니다.
+    - 실패한 결과는 저장하지 않습니다.
+    '''
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(isbn: str, content: str, version: str) -> str:
+        data = "\0".join((isbn or "", normalize_content(content), version))
+        return TAG_RESULT_KEY_PREFIX + hashlib.sha256(data.encode()).hexdigest()
+
+    async def _get(self, key: str) -> Optional[List[dict]]:
+        try:
+            data = await redis_client.redis.get(key)
+        except Exception as e:
+            logger.error(f"태그 결과 캐시 조회 오류: {e}")
+            return None
+        return json.loads(data) if data else None
+
+    async def _set(self, key: str, tags: List[dict]):
+        try:
+            await redis_client.redis.set(
+                key, json.dumps(tags, ensure_ascii=False), ex=settings.tag_result_cache_ttl
+            )
+        except Exception as e:
+            logger.error(f"태그 결과 캐시 저장 오류: {e}")
+
+    async def get_or_generate(
+        self,
+        tag_list: List[dict],
+        book_title: str,
+        isbn: str,
+        content: str,
+        generate: Callable[..., Awaitable[List[dict]]],
+    ) -> List[dict]:
+        '''
+        캐시에 있으면 저장된 태그, 없으면 generate(tag_list, book_title, isbn, content) 결과를 저장해서 반환
+        '''
+        if not settings.tag_result_cache_enabled:
+            return await generate(tag_list, book_title, isbn, content)
+
+        key = self.key(isbn, content, catalog_version(tag_list))
+        pending = self._inflight.get(key)
+        if pending is None:
+            cached = await self._get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            tags = await generate(tag_list, book_title, isbn, content)
+        except BaseException as e:
+            # 기다리던 요청에도 같은 오류를 전달 (취소된 경우는 재시도할 수 있는 오류로 바꿈)
+            error = e if isinstance(e, Exception) else RuntimeError("태그 생성이 중단되었습니다.")
+            future.set_exception(error)
+            future.exception()
+            raise
+        else:
+            future.set_result(tags)
+            await self._set(key, tags)
+            return tags
+        finally:
+            self._inflight.pop(key, None)
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "in_flight": len(self._inflight),
+        }
+
+
+tag_result_cache = TagResultCache()
@@ -0,0 +1,354 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import and_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.llm_client import CircuitOpenError, llm_client
+from app.models import Book, Post as PostModel, PostTag, UserTagPreference
+from app.redis_client import redis_client
+from app.tag_catalog import tag_catalog
+from app.tag_result_cache import tag_result_cache
+
+logger = logging.getLogger(__name__)
+
+# 게시글 태그 상태
+TAG_STATUS_PENDING = "pending"
+TAG_STATUS_DONE = "done"
+TAG_STATUS_FAILED = "failed"
+
+# 태그 작업 큐: ZSET {post_id: 실행 가능 시각}, 시도 횟수: 해시 {post_id: 횟수}
+TAGGING_QUEUE_KEY = "tagging:jobs"
+TAGGING_ATTEMPTS_KEY = "tagging:attempts"
+
+# 실행 시각이 지난 작업 하나를 꺼내면서 job_timeout 뒤로 미뤄둠 (처리 중 워커가 죽으면 다시 실행)
+# KEYS = [큐], ARGV = [현재 시각, 미룰 시각]
+CLAIM_SCRIPT = """
+local jobs = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #jobs == 0 then
+    return false
+end
+redis.call('ZADD', KEYS[1], ARGV[2], jobs[1])
+return jobs[1]
+"""
+
+
+class TagGenerationError(Exception):
+    '''
+    AI 태그 생성 실패 (재시도 대상)
+    '''
+
+
+async def load_tag_list(db: AsyncSession) -> List[dict]:
+    '''
+    프롬프트에 넣을 태그 목록 (프로세스 캐시, 바뀌었을 때만 DB 조회)
+    '''
+    return await tag_catalog.get(db)
+
+
+async def make_tags(
+    tag_list: List[dict], book_title: str, isbn: str, content: str
+) -> List[dict]:
+    """
+    ai로 태그를 생성하는 로직
+    (DB 커넥션을 잡지 않도록 태그 목록은 호출한 쪽에서 미리 읽어서 넘김)
+    LLM 엔드포인트가 비정상이면 호출하지 않고 CircuitOpenError 를 그대로 냄
+    """
+    message = []
+
+    system_content = f"""
+    당신은 독서 관련 게시글의 태그 생성 ai 입니다.
+    -책 제목
+    -책 isbn 번호
+    -게시글 내용
+
+    역할 : 위 내용들을 기반한 가장 적합한 태그를 아래의 태그 목록 내에서 겹치지 않게 최소 3개 최대 5개 출력하세요.(3개도 무방하나 가능한 4개이상 추천해 주세요)
+    -태그 목록 {tag_list}
+
+    응답 형식 : 반드시 다음 json 형식으로만 응답하세요:
+    {{"response": [{{"tag_id": "태그 아이디1", "tag_name": "태그 이름1"}},{{"tag_id": "태그 아이디2", "tag_name": "태그 이름2"}},{{"tag_id": "태그 아이디3", "tag_name": "태그 이름3"}}....]}}
+    """
+    message.append({"role": "system", "content": system_content})
+    message.append(
+        {
+            "role": "user",
+            "content": f"책 제목 : {book_title}, 책 isbn 번호 : {isbn}, 게시글 내용 : {content}",
+        }
+    )
+
+    try:
+        resp = await llm_client.post(settings.openai_url, json=message)
+        response_data = resp.json()
+        return_message = response_data["choices"][0]["message"]["content"]
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        raise TagGenerationError(f"태그 생성에 실패하였습니다: {e}")
+
+    try:
+        parsed_response = json.loads(return_message)
+
+        if "response" not in parsed_response:
+            raise ValueError("응답 형식이 잘못되었습니다.")
+
+        tags = parsed_response["response"]
+
+        if not isinstance(tags, list) or len(tags) < 3 or len(tags) > 5:
+            raise ValueError("태그 갯수가 올바르지 않습니다.")
+
+        for tag in tags:
+            if "tag_id" not in tag or "tag_name" not in tag:
+                raise ValueError("태그 형식이 올바르지 않습니다.")
+        return tags
+
+    except (ValueError, json.JSONDecodeError, KeyError) as e:
+        logger.error(f"AI 응답 검증 실패 : {e}, 응답 내용 :{return_message}")
+        raise TagGenerationError("AI 응답 검증에 실패했습니다.")
+
+
+async def generate_tags(
+    tag_list: List[dict], book_title: str, isbn: str, content: str
+) -> List[dict]:
+    '''
+    local_tagger_mode 에 따라 태그 생성
+    - off: LLM 만 사용
+    - primary: 로컬 분류기로 바로 태그 (학습 전이거나 점수가 낮으면 LLM)
+    - prefilter: 로컬 분류기 상위 후보만 LLM 프롬프트에 넣음
+    - fallback: LLM 서킷 브레이커가 열려 있으면 로컬 분류기로 태그
+    '''
+    from app.local_tagger import local_tagger
+
+    mode = settings.local_tagger_mode
+    if mode == "primary" and local_tagger.ready:
+        tags = local_tagger.predict(tag_list, book_title, content)
+        if tags is not None:
+            return tags
+    prompt_tags = tag_list
+    if mode == "prefilter" and local_tagger.ready:
+        prompt_tags = local_tagger.candidates(tag_list, book_title, content)
+
+    try:
+        # 같은 책/본문/태그 목록이면 저장된 결과 사용, 동시에 같은 요청이면 LLM 호출 하나를 같이 기다림
+        return await tag_result_cache.get_or_generate(
+            prompt_tags, book_title, isbn, content, make_tags
+        )
+    except CircuitOpenError:
+        if mode == "fallback" and local_tagger.ready:
+            tags = local_tagger.predict(tag_list, book_title, content)
+            if tags is not None:
+                return tags
+        raise
+
+
+async def apply_post_tags(db: AsyncSession, post_id: int, user_id: int, tag_ids: List[int]):
+    """
+    게시글에 태그를 붙이고 작성자의 태그 선호도를 올림 (커밋은 호출한 쪽에서)
+    """
+    db.add_all([PostTag(post_id=post_id, tag_id=tag_id) for tag_id in tag_ids])
+
+    for tag_id in tag_ids:
+        result = await db.execute(
+            select(UserTagPreference).where(
+                and_(
+                    UserTagPreference.user_id == user_id,
+                    UserTagPreference.tag_id == tag_id,
+                )
+            )
+        )
+        if result.scalars().first():
+            await db.execute(
+                update(UserTagPreference)
+                .where(
+                    and_(
+                        UserTagPreference.user_id == user_id,
+                        UserTagPreference.tag_id == tag_id,
+                    )
+                )
+                .values(frequency=UserTagPreference.frequency + 1)
+            )
+        else:
+            db.add(UserTagPreference(user_id=user_id, tag_id=tag_id))
+
+
+class TagWorker:
+    '''
+    Redis 큐 기반 AI 태그 생성 워커
+    - create_post 는 게시글을 tag_status=pending 으로 커밋하고 enqueue 만 합니다.
+    - 워커는 LLM 응답을 기다리는 동안 DB 커넥션을 잡지 않고, 결과를 받은 뒤 짧은 트랜잭션으로 반영합니다.
+    - 실패하면 지수 백오프로 tagging_max_attempts 번까지 재시도하고, 그래도 실패하면 failed 로 표시합니다.
+    - LLM 서킷 브레이커가 열려 있으면 시도 횟수를 세지 않고 쿨다운 뒤로 미룹니다.
+    - 작업을 꺼낼 때 job_timeout 만큼 미뤄두므로 처리 중 프로세스가 죽어도 다른 워커가 다시 실행합니다.
+    '''
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._claim = None
+
+    async def enqueue(self, post_id: int, delay: float = 0):
+        '''
+        실패해도 게시글은 pending 으로 남아 있으므로 requeue_stuck 이 다시 등록함
+        '''
+        try:
+            await redis_client.redis.zadd(TAGGING_QUEUE_KEY, {str(post_id): time.time() + delay})
+        except Exception as e:
+            logger.error(f"태그 작업 등록 오류: {e}")
+            return
+        self._wakeup.set()
+
+    async def requeue_stuck(self, db, batch_size: int = 1000) -> int:
+        '''
+        tagging_requeue_minutes 넘게 pending 인 게시글을 큐에 다시 등록
+        (커밋 뒤 enqueue 전에 프로세스가 죽었거나 Redis 오류로 등록하지 못한 경우)
+        이미 큐에 있는 작업(재시도 대기, 처리 중)은 실행 시각을 건드리지 않음
+        '''
+        cutoff = datetime.now() - timedelta(minutes=settings.tagging_requeue_minutes)
+        result = await db.execute(
+            select(PostModel.id)
+            .where(PostModel.tag_status == TAG_STATUS_PENDING, PostModel.created_at < cutoff)
+            .order_by(PostModel.id)
+            .limit(batch_size)
+        )
+        post_ids = result.scalars().all()
+        if not post_ids:
+            return 0
+        now = time.time()
+        added = await redis_client.redis.zadd(
+            TAGGING_QUEUE_KEY, {str(post_id): now for post_id in post_ids}, nx=True
+        )
+        if added:
+            logger.warning(f"멈춘 태그 작업 다시 등록: 게시글 {added}개")
+            self._wakeup.set()
+        return added
+
+    async def _claim_next(self) -> Optional[int]:
+        if self._claim is None:
+            self._claim = redis_client.redis.register_script(CLAIM_SCRIPT)
+        now = time.time()
+        post_id = await self._claim(
+            keys=[TAGGING_QUEUE_KEY], args=[now, now + settings.tagging_job_timeout]
+        )
+        return int(post_id) if post_id else None
+
+    async def process_one(self) -> bool:
+        '''
+        실행할 작업이 있으면 하나 처리하고 True, 없으면 False
+        '''
+        post_id = await self._claim_next()
+        if post_id is None:
+            return False
+        try:
+            await self._tag_post(post_id)
+        except CircuitOpenError as e:
+            # 엔드포인트 장애는 게시글 탓이 아니므로 시도 횟수를 늘리지 않고 쿨다운 뒤로 미룸
+            await redis_client.redis.zadd(
+                TAGGING_QUEUE_KEY, {str(post_id): time.time() + e.retry_after}
+            )
+        except Exception as e:
+            await self._retry(post_id, e)
+        else:
+            async with redis_client.redis.pipeline(transaction=True) as pipe:
+                pipe.zrem(TAGGING_QUEUE_KEY, str(post_id))
+                pipe.hdel(TAGGING_ATTEMPTS_KEY, str(post_id))
+                await pipe.execute()
+        return True
+
+    async def _retry(self, post_id: int, error: Exception):
+        attempts = await redis_client.redis.hincrby(TAGGING_ATTEMPTS_KEY, str(post_id), 1)
+        if attempts < settings.tagging_max_attempts:
+            delay = settings.tagging_retry_base_seconds * 2 ** (attempts - 1)
+            logger.warning(f"게시글 {post_id} 태그 생성 실패 ({attempts}회), {delay}초 뒤 재시도: {error}")
+            await redis_client.redis.zadd(TAGGING_QUEUE_KEY, {str(post_id): time.time() + delay})
+            return
+
+        logger.error(f"게시글 {post_id} 태그 생성 최종 실패: {error}")
+        from app.database import session_scope
+        async with session_scope("tagging") as db:
+            await db.execute(
+                update(PostModel)
+                .where(PostModel.id == post_id, PostModel.tag_status == TAG_STATUS_PENDING)
+                .values(tag_status=TAG_STATUS_FAILED)
+            )
+            await db.commit()
+        async with redis_client.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(TAGGING_QUEUE_KEY, str(post_id))
+            pipe.hdel(TAGGING_ATTEMPTS_KEY, str(post_id))
+            await pipe.execute()
+
+    async def _tag_post(self, post_id: int):
+        from app.database import session_scope
+        from app.recommender import recommendation_cache
+        from app.tag_index import tag_index
+
+        async with session_scope("tagging") as db:
+            result = await db.execute(
+                select(PostModel, Book.title)
+                .outerjoin(Book, Book.isbn == PostModel.isbn)
+                .where(PostModel.id == post_id)
+            )
+            row = result.first()
+            if row is None or row[0].tag_status != TAG_STATUS_PENDING:
+                return
+            post, book_title = row
+            user_id, isbn, content = post.user_id, post.isbn, post.content
+            tag_list = await load_tag_list(db)
+            # LLM 응답을 기다리는 동안 트랜잭션(커넥션)을 잡고 있지 않도록 읽기 트랜잭션 종료
+            await db.rollback()
+
+            tags = await generate_tags(tag_list, book_title, isbn, content)
+
+            tag_ids = list(dict.fromkeys(int(tag["tag_id"]) for tag in tags))
+            known = {int(tag["tag_id"]) for tag in tag_list}
+            tag_ids = [tag_id for tag_id in tag_ids if tag_id in known]
+
+            # 다른 워커가 먼저 처리했으면 건너뜀
+            result = await db.execute(
+                update(PostModel)
+                .where(PostModel.id == post_id, PostModel.tag_status == TAG_STATUS_PENDING)
+                .values(tag_status=TAG_STATUS_DONE)
+                .execution_options(synchronize_session=False)
+            )
+            if not result.rowcount:
+                await db.rollback()
+                return
+            await apply_post_tags(db, post_id, user_id, tag_ids)
+            await db.commit()
+
+        tag_index.add_post(post_id, user_id, tag_ids)
+        # 작성자 선호도가 바뀌었고 새 게시글이 생겼으므로 추천 목록 갱신
+        await recommendation_cache.on_post_tagged(post_id, user_id, tag_ids)
+
+    async def _run(self):
+        while True:
+            try:
+                if await self.process_one():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"태그 워커 오류: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.tagging_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run())
+            for _ in range(settings.tagging_worker_concurrency)
+        ]
+        logger.info(f"태그 워커 시작: {len(self._tasks)}개")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+tag_worker = TagWorker()
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+from app.config import settings
+from app.models import User
+from app.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# 캐시에 저장하는 User 컬럼 (password_hash 같은 인증 정보는 넣지 않음, 필요한 곳에서 DB 로 조회)
+USER_FIELDS = ("id", "username", "email", "bio", "total_views", "created_at")
+
+# 사용자 정보가 바뀌거나 탈퇴했을 때 모든 워커의 LRU 에서 지우도록 알리는 채널 (메시지: user_id)
+USER_INVALIDATE_CHANNEL = "user:principal:invalidate"
+
+
+class UserCache:
+    '''
+    인증 사용자 정보 캐시
+    - 1차: 프로세스 내 LRU (짧은 TTL, 워커마다 따로 존재)
+    - 2차: Redis (워커끼리 공유)
+    invalidate 는 Redis pub/sub 으로 다른 워커의 LRU 에서도 지웁니다.
+    (구독이 끊긴 동안 놓친 알림은 local_ttl 이 지나면 반영)
+    '''
+    def __init__(self, maxsize: int, local_ttl: int, ttl: int):
+        self.maxsize = maxsize
+        self.local_ttl = local_ttl
+        self.ttl = ttl
+        self._local = OrderedDict()  # user_id -> (만료 시각, 데이터)
+        self._listener: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}:principal"
+
+    @staticmethod
+    def to_dict(user: User) -> dict:
+        data = {field: getattr(user, field) for field in USER_FIELDS}
+        if data["created_at"] is not None:
+            data["created_at"] = data["created_at"].isoformat()
+        return data
+
+    @staticmethod
+    def from_dict(data: dict) -> dict:
+        # 이전 버전이 저장한 값에 다른 컬럼이 있어도 USER_FIELDS 만 사용
+        data = {field: data[field] for field in USER_FIELDS if field in data}
+        if data.get("created_at"):
+            data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return data
+
+    def _get_local(self, user_id: int) -> Optional[dict]:
+        item = self._local.get(user_id)
+        if item is None:
+            return None
+        expires_at, data = item
+        if expires_at < time.monotonic():
+            self._local.pop(user_id, None)
+            return None
+        self._local.move_to_end(user_id)
+        return data
+
+    def _set_local(self, user_id: int, data: dict):
+        self._local[user_id] = (time.monotonic() + self.local_ttl, data)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    async def get(self, user_id: int) -> Optional[dict]:
+        '''
+        캐시된 User 컬럼 값을 반환 (없으면 None)
+        '''
+        data = self._get_local(user_id)
+        if data is not None:
+            return self.from_dict(data)
+
+        raw = await redis_client.get(self._key(user_id))
+        if raw is None:
+            return None
+        try:
+            data = json.loads(raw)
+        except (TypeError, json.JSONDecodeError) as e:
+            logger.error(f"User 캐시 파싱 오류: {e}")
+            return None
+        self._set_local(user_id, data)
+        return self.from_dict(data)
+
+    async def set(self, user: User):
+        data = self.to_dict(user)
+        self._set_local(user.id, data)
+        await redis_client.set(self._key(user.id), json.dumps(data), expire=self.ttl)
+
+    async def invalidate(self, user_id: int):
+        self._local.pop(user_id, None)
+        await redis_client.delete(self._key(user_id))
+        try:
+            await redis_client.redis.publish(USER_INVALIDATE_CHANNEL, user_id)
+        except Exception as e:
+            logger.error(f"User 캐시 무효화 알림 오류: {e}")
+
+    def _on_invalidate(self, data: Optional[str]):
+        try:
+            self._local.pop(int(data), None)
+        except (TypeError, ValueError):
+            self._local.clear()
+
+    def start(self):
+        self._listener = asyncio.create_task(
+            redis_client.subscribe(
+                USER_INVALIDATE_CHANNEL, self._on_invalidate, on_reset=self._local.clear
+            )
+        )
+
+    async def stop(self):
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        await asyncio.gather(self._listener, return_exceptions=True)
+        self._listener = None
+
+
+user_cache = UserCache(
+    maxsize=settings.user_cache_size,
+    local_ttl=settings.user_cache_local_ttl,
+    ttl=settings.user_cache_ttl,
+)
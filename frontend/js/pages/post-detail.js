@@ -114,8 +114,7 @@ function renderPost(post) {
 async function loadLikeStatus(postId) {
   try {
     const likeData = await getPostLikes(postId);
-    const currentUserId = parseInt(getUserId());
-    isLiked = likeData.users.includes(currentUserId);
+    isLiked = likeData.liked;
     likeCount = likeData.like_count;
     
     // UI가 이미 렌더링된 경우 업데이트
@@ -4,21 +4,37 @@ from fastapi import Depends, FastAPI, status, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import HTTPException
 from pydantic import ValidationError
-from sqlalchemy import update
+from sqlalchemy import select, update
 from app.config import settings
-from app.database import create_table, get_db
+from app.database import (
+    SQL_STATEMENTS_HEADER,
+    SessionScopeMiddleware,
+    async_engine,
+    get_async_db,
+)
 from app.models import User
+from app.pagination import NEXT_CURSOR_HEADER
 from app.routers.auth import router as auth_router  # auth.py의 라우터 연결
 from app.routers import comments, posts, recommendation, likes
 from app.routers.follows import router as follow_router
+from app.routers.internal import router as internal_router
 from app.routers.search import router as search_router
-from app.scheduler import start_scheduler, stop_scheduler
+from app.llm_client import llm_client
+from app.tag_catalog import tag_catalog
+from app.scheduler import release_leadership, start_scheduler, stop_scheduler
+from app.tagging import tag_worker
 from app.schemas import UserInfoUpdate, UserPasswordUpdate, UserResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
-from app.security import PasswordHasher, get_current_user, get_current_user_optional
+from app.security import (
+    PasswordHasher,
+    get_current_user,
+    get_current_user_optional,
+    load_password_hash,
+)
 import logging
 from app.redis_client import redis_client
+from app.user_cache import user_cache
 
 
 logging.basicConfig(
@@ -28,11 +44,21 @@ logging.basicConfig(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await redis_client.connect()
+    await llm_client.connect()
     start_scheduler()
+    tag_worker.start()
+    tag_catalog.start()
+    user_cache.start()
     print("스케줄러 작동 완료")
     yield
-    await redis_client.disconnect()
+    await tag_worker.stop()
+    await tag_catalog.stop()
+    await user_cache.stop()
     stop_scheduler()
+    await release_leadership()
+    await redis_client.disconnect()
+    await llm_client.disconnect()
+    await async_engine.dispose()
     print("스케줄러 종료")
 
 app = FastAPI(
@@ -49,7 +75,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, SQL_STATEMENTS_HEADER],
 )
+app.add_middleware(SessionScopeMiddleware)
 
 @app.exception_handler(ValidationError)
 def validation_handler(request, exc):
@@ -67,6 +95,7 @@ app.include_router(comments.router)
 app.include_router(recommendation.router)
 app.include_router(posts.router)
 app.include_router(likes.router)
+app.include_router(internal_router)
 
 # @app.get('/healthy')
 # def health_check():
@@ -76,10 +105,11 @@ app.include_router(likes.router)
 @app.get("/user/{user_id}", response_model=UserResponse)
 async def user_info(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: Optional[User] = Depends(get_current_user_optional),
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="사용자를 찾을 수 없습니다."
@@ -101,10 +131,11 @@ async def user_info(
 async def update_password(
     data: UserPasswordUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if not PasswordHasher.verify_password_combined(
-        data.password, current_user.password_hash
+    password_hash = await load_password_hash(db, current_user.id)
+    if not password_hash or not PasswordHasher.verify_password_combined(
+        data.password, password_hash
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -118,7 +149,7 @@ async def update_password(
         )
 
     if PasswordHasher.verify_password_combined(
-        data.new_password, current_user.password_hash
+        data.new_password, password_hash
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -128,7 +159,8 @@ async def update_password(
     hash_password = PasswordHasher.hash_password_combined(data.new_password)
 
     current_user.password_hash = hash_password
-    db.commit()
+    await db.commit()
+    await user_cache.invalidate(current_user.id)
     return {"message": "비밀번호를 변경했습니다."}
 
 
@@ -136,11 +168,12 @@ async def update_password(
 async def update_user_info(
     data: UserInfoUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         if data.username and data.username != current_user.username:
-            is_username = db.query(User).filter(User.username == data.username).first()
+            result = await db.execute(select(User).where(User.username == data.username))
+            is_username = result.scalars().first()
             if is_username:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -154,21 +187,23 @@ async def update_user_info(
                 if data.bio is not None
                 else "사용자가 소개를 입력하지 않았습니다."
             )
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await user_cache.invalidate(current_user.id)
+        await db.refresh(current_user)
         return current_user
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="정보 변경에 실패 했습니다.",
         )
 
 @app.get('user/{username}', response_model=UserResponse)
-async def search_user(username: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == username).first()
+async def search_user(username: str, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="해당유저가 존재하지 않습니다.")
     return user
\ No newline at end of file
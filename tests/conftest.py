@@ -0,0 +1,113 @@
+import os
+import sys
+import tempfile
+from contextlib import asynccontextmanager
+import fakeredis.aioredis
+import pytest
+
+# app.config.Settings 에 필요한 환경 변수 (테스트용 기본값)
+# 앱 엔진(app.database)은 마이그레이션을 적용할 수 있도록 임시 파일 DB 사용
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(prefix="blog-test-"), "blog.db")
+)
+os.environ.setdefault("JWT_SECRET", "test-secret-key-for-pytest-only-000")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic")
+
+
+@pytest.fixture
+def sqlite_db():
+    '''
+    모델로 테이블을 만든 메모리 sqlite 세션을 여는 async context manager
+    (pytest-asyncio 없이 테스트 안에서 asyncio.run 으로 실행)
+    '''
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from app.database import Base
+
+    @asynccontextmanager
+    async def open_db():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                yield db
+        finally:
+            await engine.dispose()
+
+    return open_db
+
+
+@pytest.fixture
+def fake_redis():
+    '''
+    redis_client 를 fakeredis 로 바꿈 (테스트의 이벤트 루프 안에서 연결됨)
+    '''
+    from app.redis_client import redis_client
+
+    redis_client.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    redis_client._scripts = {}
+    yield redis_client.redis
+    redis_client.redis = None
+    redis_client._scripts = {}
+
+
+@pytest.fixture
+def sync_engine():
+    '''
+    앱 DB 파일을 지우고 alembic 마이그레이션을 head 까지 적용한 동기 엔진 (데이터 준비용)
+    '''
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine import make_url
+    from app.config import settings
+
+    url = make_url(settings.database_url).set(drivername="sqlite")
+    if os.path.exists(url.database):
+        os.remove(url.database)
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    config.set_main_option("sqlalchemy.url", url.render_as_string(hide_password=False))
+    command.upgrade(config, "head")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(sync_engine, monkeypatch):
+    '''
+    fakeredis 로 띄운 main.app (스케줄러와 태그 워커는 시작하지 않음), SQL 문 수 헤더 켬
+    '''
+    import main
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.redis_client import redis_client
+    from app.tag_catalog import tag_catalog
+    from app.tagging import tag_worker
+    from app.user_cache import user_cache
+
+    # 이전 테스트 DB 의 사용자/태그가 프로세스 캐시에 남지 않도록
+    user_cache._local.clear()
+    tag_catalog.expire()
+
+    async def connect():
+        redis_client.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        redis_client._scripts = {}
+
+    async def stop():
+        pass
+
+    monkeypatch.setattr(redis_client, "connect", connect)
+    monkeypatch.setattr(main, "start_scheduler", lambda: None)
+    monkeypatch.setattr(main, "stop_scheduler", lambda: None)
+    monkeypatch.setattr(tag_worker, "start", lambda: None)
+    monkeypatch.setattr(tag_worker, "stop", stop)
+    monkeypatch.setattr(settings, "sql_statement_counter", True)
+    with TestClient(main.app) as client:
+        yield client
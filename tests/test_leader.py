@@ -0,0 +1,34 @@
+import asyncio
+from sqlalchemy import select
+from app.leader import LeaderElection
+from app.models import SchedulerFence
+
+
+def test_fence_rejects_stale_leader(sqlite_db, fake_redis, monkeypatch):
+    '''
+    Redis 확인은 통과했어도 더 높은 토큰이 DB에 반영된 이전 리더는 커밋하지 못해야 함
+    '''
+    async def run():
+        async with sqlite_db() as db:
+            old = LeaderElection("test", lease_seconds=30)
+            new = LeaderElection("test", lease_seconds=30)
+            assert await old.acquire_or_renew()
+            assert await old.fence(db)
+            await db.commit()
+
+            # 이전 리더의 임대가 끊기고 새 리더가 먼저 반영
+            await fake_redis.delete(old.key)
+            assert await new.acquire_or_renew()
+            assert await new.fence(db)
+            await db.commit()
+
+            # 이전 리더가 Redis 확인 직후 멈췄다가 늦게 커밋하려는 경우
+            async def still_leader():
+                return True
+
+            monkeypatch.setattr(old, "still_leader", still_leader)
+            assert not await old.fence(db)
+            await db.rollback()
+            assert await db.scalar(select(SchedulerFence.token)) == new.token == 2
+
+    asyncio.run(run())
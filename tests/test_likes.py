@@ -0,0 +1,147 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+from app.config import settings
+from app.models import Like, Post, User
+from app.redis_client import redis_client
+from app.routers.likes import buffered_like, like_post
+from app.scheduler import apply_like_ops
+
+
+def test_like_missing_post_is_404(sqlite_db, monkeypatch):
+    monkeypatch.setattr(settings, "like_write_behind", False)
+
+    async def run():
+        async with sqlite_db() as db:
+            # postgresql 처럼 외래키를 검사해서 INSERT 가 IntegrityError 가 나도록
+            await db.execute(text("PRAGMA foreign_keys=ON"))
+            user = User(id=1, username="u", email="u@x.com")
+            db.add(user)
+            await db.commit()
+
+            with pytest.raises(HTTPException) as error:
+                await like_post(404, db=db, current_user=user)
+            assert error.value.status_code == 404
+            assert await db.scalar(select(func.count()).select_from(Like)) == 0
+
+    asyncio.run(run())
+
+
+def like_rows(db, post_id):
+    return db.scalars(select(Like.user_id).where(Like.post_id == post_id))
+
+
+async def seed_post(db):
+    user = User(id=1, username="u", email="u@x.com")
+    db.add_all([user, Post(id=1, user_id=1, title="t", content="c", like_count=0)])
+    await db.commit()
+    return user
+
+
+def test_toggle_during_flush_is_not_lost(sqlite_db, fake_redis):
+    '''
+    스케줄러가 토글을 꺼낸 뒤 커밋하기 전에 다시 누른 토글이 사라지지 않아야 함
+    '''
+    async def run():
+        async with sqlite_db() as db:
+            user = await seed_post(db)
+            assert (await buffered_like(1, user, db))["liked"] is True
+
+            ops = await redis_client.drain_like_ops(100)
+            assert ops == {1: {1: True}}
+            # 아직 커밋 전이라 DB에는 좋아요가 없지만 반영 중인 토글이 기준
+            assert await redis_client.pending_like(1, 1) == (True, 1)
+            assert await buffered_like(1, user, db) == {"liked": False, "like_count": 0}
+
+            await apply_like_ops(db, ops)
+            await db.commit()
+            await redis_client.clear_inflight_likes(ops.keys())
+            assert list(await like_rows(db, 1)) == [1]
+            assert await redis_client.pending_like(1, 1) == (False, -1)
+
+            await apply_like_ops(db, await redis_client.drain_like_ops(100))
+            await db.commit()
+            assert list(await like_rows(db, 1)) == []
+            assert await db.scalar(select(Post.like_count).where(Post.id == 1)) == 0
+
+    asyncio.run(run())
+
+
+def test_failed_flush_restores_inflight(sqlite_db, fake_redis):
+    async def run():
+        async with sqlite_db() as db:
+            user = await seed_post(db)
+            other = User(id=2, username="v", email="v@x.com")
+            db.add(other)
+            await db.commit()
+            await buffered_like(1, user, db)
+            await buffered_like(1, other, db)
+
+            ops = await redis_client.drain_like_ops(100)
+            # 반영 중에 user 가 취소 -> 반영 실패로 되돌리면 user 는 DB 상태(좋아요 없음) 그대로
+            await buffered_like(1, user, db)
+            await redis_client.restore_like_ops(ops.keys())
+            assert await redis_client.pending_like(1, 1) == (None, 1)
+            assert await redis_client.pending_like(1, 2) == (True, 1)
+            assert await redis_client.drain_like_ops(100) == {1: {2: True}}
+
+    asyncio.run(run())
+
+
+HOT_POST_USERS = 30
+
+
+def test_hot_post_like_count_matches_rows(sync_engine, client, monkeypatch):
+    '''
+    인기 글 하나에 여러 사용자가 동시에 좋아요를 누르는 사이 스케줄러가 계속 반영해도
+    마지막 반영 뒤 like_count 가 likes 행 수와 같아야 함
+    '''
+    import httpx
+    import main
+    from sqlalchemy.orm import Session
+    from app.scheduler import flush_buffered_likes
+    from app.security import create_access_token
+
+    monkeypatch.setattr(settings, "like_write_behind", True)
+    with Session(sync_engine) as db:
+        db.add_all([
+            User(id=user_id, username=f"u{user_id}", email=f"u{user_id}@x.com")
+            for user_id in range(1, HOT_POST_USERS + 1)
+        ])
+        db.flush()
+        db.add(Post(id=1, user_id=1, title="t", content="c", like_count=0))
+        db.commit()
+    # 사용자마다 누르는 횟수를 다르게 -> 홀수 번 누른 사용자만 좋아요로 남음
+    presses = {user_id: user_id % 4 + 1 for user_id in range(1, HOT_POST_USERS + 1)}
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            async def press(user_id):
+                headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+                for _ in range(presses[user_id]):
+                    response = await http.post("/likes/1/like", headers=headers)
+                    assert response.status_code == 200, response.text
+
+            done = asyncio.Event()
+
+            async def flusher():
+                while not done.is_set():
+                    await flush_buffered_likes()
+                    await asyncio.sleep(0)
+
+            flushing = asyncio.create_task(flusher())
+            try:
+                await asyncio.gather(*(press(user_id) for user_id in presses))
+            finally:
+                done.set()
+                await flushing
+            await flush_buffered_likes()
+            return await redis_client.pending_like(1)
+
+    assert client.portal.call(run) == (None, 0)
+    with Session(sync_engine) as db:
+        rows = set(like_rows(db, 1))
+        assert rows == {user_id for user_id, count in presses.items() if count % 2}
+        assert db.scalar(select(Post.like_count).where(Post.id == 1)) == len(rows)
@@ -0,0 +1,115 @@
+import asyncio
+import httpx
+import pytest
+from app.config import settings
+from app.llm_client import CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN, CircuitOpenError, LLMClient
+
+URL = "http://llm.test/generate"
+
+
+async def stub_client(monkeypatch, handler, concurrency: int = 4) -> LLMClient:
+    '''
+    handler(request) 로 응답하는 스텁 전송을 쓰는 LLMClient (동시 호출 제한은 connect 에서 만든 그대로)
+    '''
+    monkeypatch.setattr(settings, "llm_max_concurrency", concurrency)
+    client = LLMClient()
+    await client.connect()
+    await client.client.aclose()
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_concurrency_is_capped(monkeypatch):
+    async def run():
+        in_flight = peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, json={"ok": True})
+
+        client = await stub_client(monkeypatch, handler, concurrency=2)
+        responses = await asyncio.gather(*(client.post(URL, json={}) for _ in range(10)))
+        assert [r.status_code for r in responses] == [200] * 10
+        assert peak == 2
+        assert client.snapshot()["requests"] == 10
+        await client.disconnect()
+
+    asyncio.run(run())
+
+
+def test_breaker_opens_half_opens_and_closes(monkeypatch):
+    monkeypatch.setattr(settings, "llm_breaker_failures", 3)
+    monkeypatch.setattr(settings, "llm_breaker_cooldown_seconds", 30)
+
+    async def run():
+        status = {"code": 503}
+        calls = 0
+
+        async def handler(request):
+            nonlocal calls
+            calls += 1
+            return httpx.Response(status["code"], json={})
+
+        client = await stub_client(monkeypatch, handler)
+
+        # 연속 3번 실패하면 열림
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.post(URL, json={})
+        assert client.state == CIRCUIT_OPEN
+
+        # 열려 있는 동안은 엔드포인트를 호출하지 않고 바로 실패
+        with pytest.raises(CircuitOpenError):
+            await client.post(URL, json={})
+        assert calls == 3 and client.snapshot()["rejected"] == 1
+
+        # 쿨다운이 지나면 시험 호출 하나만 통과 (실패하면 다시 열림)
+        client._opened_at -= settings.llm_breaker_cooldown_seconds
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.post(URL, json={})
+        assert client.state == CIRCUIT_OPEN and calls == 4
+
+        # 시험 호출 중에는 다른 호출을 막고, 시험 호출이 성공하면 닫힘
+        client._opened_at -= settings.llm_breaker_cooldown_seconds
+        status["code"] = 200
+        gate = asyncio.Event()
+
+        async def slow_handler(request):
+            nonlocal calls
+            calls += 1
+            await gate.wait()
+            return httpx.Response(200, json={})
+
+        await client.client.aclose()
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(slow_handler))
+        probe = asyncio.create_task(client.post(URL, json={}))
+        await asyncio.sleep(0)
+        assert client.state == CIRCUIT_HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            await client.post(URL, json={})
+        gate.set()
+        assert (await probe).status_code == 200
+        assert client.state == CIRCUIT_CLOSED and client.snapshot()["consecutive_failures"] == 0
+
+        assert (await client.post(URL, json={})).status_code == 200
+        await client.disconnect()
+
+    asyncio.run(run())
+
+
+def test_client_errors_do_not_open_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "llm_breaker_failures", 1)
+
+    async def run():
+        client = await stub_client(monkeypatch, lambda request: httpx.Response(400, json={}))
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.post(URL, json={})
+        assert client.state == CIRCUIT_CLOSED
+        await client.disconnect()
+
+    asyncio.run(run())
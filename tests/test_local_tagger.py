@@ -0,0 +1,79 @@
+import asyncio
+from app.config import settings
+from app.local_tagger import LocalTagger
+from app.models import Post, PostTag, Tag, User
+
+
+def test_train_fits_outside_transaction(sqlite_db, monkeypatch):
+    '''
+    학습(스레드)하는 동안 DB 트랜잭션을 열어두지 않아야 함
+    '''
+    monkeypatch.setattr(settings, "local_tagger_min_posts", 1)
+    monkeypatch.setattr(settings, "local_tagger_feature_bits", 8)
+
+    async def run():
+        async with sqlite_db() as db:
+            db.add_all([User(id=1, username="u", email="u@x.com"), Tag(id=1, name="소설")])
+            db.add_all([Post(id=i, user_id=1, title="t", content=f"본문 {i}", tag_status="done") for i in (1, 2)])
+            await db.flush()
+            db.add_all([PostTag(post_id=i, tag_id=1) for i in (1, 2)])
+            await db.commit()
+
+            tagger = LocalTagger()
+            fit = tagger._fit
+            in_transaction = []
+
+            def record_fit(docs):
+                in_transaction.append(db.in_transaction())
+                return fit(docs)
+
+            monkeypatch.setattr(tagger, "_fit", record_fit)
+            await tagger.train(db)
+            assert in_transaction == [False]
+            assert tagger.ready
+
+    asyncio.run(run())
+
+
+TAG_LIST = [{"tag_id": i, "tag_name": name} for i, name in enumerate(["소설", "역사", "과학", "경제", "여행"], 1)]
+
+
+def trained_tagger() -> LocalTagger:
+    tagger = LocalTagger()
+    docs = [
+        ("소설 이야기 주인공", [1, 2, 3]),
+        ("역사 왕조 전쟁", [2, 4, 5]),
+        ("과학 실험 우주", [3, 4, 5]),
+    ]
+    tagger._fit(docs * 4)
+    return tagger
+
+
+def test_predict_without_overlap_returns_none(monkeypatch):
+    '''
+    학습한 글과 겹치는 어휘가 없으면 점수가 모두 0 -> 아무 태그나 고르지 않고 None
+    '''
+    monkeypatch.setattr(settings, "local_tagger_feature_bits", 12)
+    tagger = trained_tagger()
+    assert tagger.predict(TAG_LIST, "", "qwxz") is None
+
+    tags = tagger.predict(TAG_LIST, "", "소설 이야기 주인공")
+    assert sorted(tag["tag_id"] for tag in tags[:3]) == [1, 2, 3]
+
+
+def test_primary_mode_falls_back_to_llm(monkeypatch):
+    from app import tagging
+    from app.local_tagger import local_tagger
+
+    monkeypatch.setattr(settings, "local_tagger_feature_bits", 12)
+    monkeypatch.setattr(settings, "local_tagger_mode", "primary")
+    monkeypatch.setattr(local_tagger, "_model", trained_tagger()._model)
+    llm_tags = [{"tag_id": 5, "tag_name": "여행"}]
+
+    async def get_or_generate(*args):
+        return llm_tags
+
+    monkeypatch.setattr(tagging.tag_result_cache, "get_or_generate", get_or_generate)
+    assert asyncio.run(tagging.generate_tags(TAG_LIST, "", "isbn", "qwxz")) is llm_tags
+    local = asyncio.run(tagging.generate_tags(TAG_LIST, "", "isbn", "역사 왕조 전쟁"))
+    assert local is not llm_tags and local[0]["tag_id"] in (2, 4, 5)
@@ -0,0 +1,113 @@
+import base64
+import json
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy.orm import Session
+from app.models import Book, Like, Post, User
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.security import create_access_token
+
+USER_ID = 1
+ISBN = "1234567890123"
+# 검색 페이지 크기(10)를 넘도록
+POST_COUNT = 23
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+@pytest.fixture
+def seeded(sync_engine):
+    '''
+    게시글 POST_COUNT 개 (두 개씩 같은 작성 시각) 와 사용자 1 의 좋아요 (두 개씩 같은 좋아요 시각)
+    같은 시각끼리는 id 로 순서가 정해지는지 확인하기 위해 일부러 겹치게 만듦
+    '''
+    start = datetime(2026, 1, 1)
+    with Session(sync_engine) as db:
+        db.add_all([User(id=USER_ID, username="u", email="u@x.com"), Book(isbn=ISBN, title="책")])
+        db.flush()
+        db.add_all([
+            Post(id=post_id, user_id=USER_ID, title=f"title {post_id}", content="content", isbn=ISBN,
+                 created_at=start + timedelta(minutes=post_id // 2))
+            for post_id in range(1, POST_COUNT + 1)
+        ])
+        db.flush()
+        db.add_all([
+            Like(user_id=USER_ID, post_id=post_id, created_at=start + timedelta(minutes=post_id // 2))
+            for post_id in range(1, POST_COUNT + 1)
+        ])
+        db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(USER_ID)})}"}
+
+
+def walk(client, path: str, headers: dict, params: dict, items=lambda body: body):
+    '''
+    X-Next-Cursor 를 따라 끝까지 읽고 (페이지별 항목, 페이지별 다음 커서) 반환
+    '''
+    pages, cursors, cursor = [], [], None
+    while True:
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200, response.text
+        pages.append(items(response.json()))
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        cursors.append(cursor)
+        if not cursor:
+            return pages, cursors
+
+
+def test_cursor_round_trip():
+    values = [1.5, datetime(2026, 1, 2, 3, 4, 5), 7]
+    assert decode_cursor(encode_cursor(values), [float, datetime, int]) == values
+
+
+@pytest.mark.parametrize(
+    "path, params, login, items, page_sizes",
+    [
+        ("/likes/user", {"limit": 5}, True, lambda body: [post["id"] for post in body], [5, 5, 5, 5, 3]),
+        ("/likes/1/likes", {"limit": 1}, True, lambda body: body["users"], [1, 0]),
+        # 검색은 로그인하면 자기 글을 빼므로 비로그인으로
+        ("/search/", {}, False, lambda body: [post["post_id"] for post in body], [10, 10, 3]),
+        ("/search/", {"q": "title"}, False, lambda body: [post["post_id"] for post in body], [10, 10, 3]),
+    ],
+    ids=["likes/user", "post likes", "search", "search q"],
+)
+def test_cursor_pages(client, seeded, path, params, login, items, page_sizes):
+    '''
+    마지막 페이지 전까지는 X-Next-Cursor 가 있고, 마지막 페이지에는 없으며, 빠지거나 겹치는 항목이 없음
+    '''
+    headers = seeded if login else {}
+    pages, cursors = walk(client, path, headers, params, items)
+    assert [len(page) for page in pages] == page_sizes
+    assert all(cursors[:-1]) and cursors[-1] is None
+    ids = sum(pages, [])
+    assert len(ids) == len(set(ids))
+    if path != "/likes/1/likes":
+        assert sorted(ids) == list(range(1, POST_COUNT + 1))
+    if path != "/likes/1/likes" and "q" not in params:
+        # 최신순 (q 가 있으면 관련도가 먼저): 같은 시각이면 id 내림차순
+        assert ids == sorted(ids, key=lambda post_id: (post_id // 2, post_id), reverse=True)
+
+    # 처음 페이지는 page 페이지네이션과 같은 결과
+    response = client.get(path, params=params, headers=headers)
+    assert items(response.json()) == pages[0]
+
+
+@pytest.mark.parametrize(
+    "path, cursor",
+    [
+        ("/likes/user", "not base64 !!"),
+        ("/likes/user", raw_cursor({"created_at": "2026-01-01"})),
+        ("/likes/user", raw_cursor(["2026-01-01T00:00:00"])),
+        ("/likes/user", raw_cursor(["어제", 3])),
+        ("/likes/user", raw_cursor(["2026-01-01T00:00:00", "x"])),
+        ("/likes/1/likes", raw_cursor(["2026-01-01T00:00:00", 1, 2])),
+        ("/search/", raw_cursor([1.0, "2026-01-01T00:00:00", 3])),
+        ("/recommendation/popular", raw_cursor(["high", 3, "raw"])),
+        ("/recommendation/popular", raw_cursor([1.0, 3])),
+    ],
+)
+def test_bad_cursor_is_400(client, seeded, path, cursor):
+    response = client.get(path, params={"cursor": cursor}, headers=seeded)
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "잘못된 커서입니다."
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.leaderboard import popular_leaderboard
+from app.models import Book, Post, User
+from app.pagination import NEXT_CURSOR_HEADER
+from app.redis_client import redis_client
+from app.scheduler import rebuild_popular_leaderboard
+from app.security import create_access_token
+
+AUTHOR_ID = 1
+VIEWER_ID = 2
+ISBN = "1234567890123"
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def seed_posts(engine, count: int = 10):
+    '''
+    좋아요가 많은 게시글 count 개를 DB 에만 넣음 (리더보드에는 없음)
+    작성자는 번갈아 가며 AUTHOR_ID / VIEWER_ID
+    '''
+    start = datetime(2026, 1, 1)
+    with Session(engine) as db:
+        db.add_all([
+            User(id=AUTHOR_ID, username="author", email="author@x.com"),
+            User(id=VIEWER_ID, username="viewer", email="viewer@x.com"),
+            Book(isbn=ISBN, title="책", author="저자"),
+        ])
+        db.flush()
+        db.add_all([
+            Post(
+                id=post_id,
+                user_id=AUTHOR_ID if post_id % 2 else VIEWER_ID,
+                title=f"title {post_id}",
+                content="content",
+                isbn=ISBN,
+                like_count=50 + post_id,
+                views=0,
+                created_at=start + timedelta(hours=post_id),
+            )
+            for post_id in range(1, count + 1)
+        ])
+        db.commit()
+
+
+def create_posts(client, count: int):
+    for i in range(count):
+        response = client.post(
+            "/posts/",
+            json={"title": f"new {i}", "content": "new", "isbn": ISBN, "book_title": "책", "book_author": "저자"},
+            headers=auth(AUTHOR_ID),
+        )
+        assert response.status_code == 200, response.text
+
+
+def popular_ids(client, headers=None, **params) -> list:
+    response = client.get("/recommendation/popular", params=params, headers=headers or {})
+    assert response.status_code == 200, response.text
+    return [post["id"] for post in response.json()]
+
+
+def walk_pages(client, limit: int, between=None, headers=None) -> list:
+    ids, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/recommendation/popular", params=params, headers=headers or {})
+        assert response.status_code == 200, response.text
+        ids += [post["id"] for post in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return ids
+        if between:
+            between(ids)
+
+
+def test_updates_before_rebuild_do_not_hide_db_posts(sync_engine, client):
+    '''
+    리더보드를 만들기 전에 새 글이 추가돼도 DB 에만 있는 인기 글이 빠지지 않아야 함
+    '''
+    seed_posts(sync_engine)
+    create_posts(client, 3)
+    assert not client.portal.call(redis_client.redis.exists, popular_leaderboard.ready_key)
+    assert popular_ids(client, limit=20)[:10] == list(range(10, 0, -1))
+
+    client.portal.call(rebuild_popular_leaderboard)
+    assert popular_ids(client, limit=20)[:10] == list(range(10, 0, -1))
+    assert len(popular_ids(client, limit=20)) == 13
+
+
+def test_offset_pages_skip_viewer_posts(sync_engine, client):
+    seed_posts(sync_engine)
+    client.portal.call(rebuild_popular_leaderboard)
+    viewer = auth(VIEWER_ID)
+    # 짝수 id 는 VIEWER_ID 의 글
+    expected = [post_id for post_id in range(10, 0, -1) if post_id % 2]
+    pages = [popular_ids(client, viewer, limit=2, page=page) for page in (1, 2, 3)]
+    assert sum(pages, []) == expected
+
+
+def test_decay_cursor_survives_score_change(sync_engine, client, monkeypatch):
+    '''
+    시간 감쇠 점수 커서: 페이지를 넘기는 사이 점수가 바뀌어도 빠지거나 겹치지 않음
+    '''
+    monkeypatch.setattr(settings, "popular_decay_half_life_hours", 24.0)
+    seed_posts(sync_engine)
+    client.portal.call(rebuild_popular_leaderboard)
+
+    def like_last(ids):
+        # 방금 읽은 페이지의 마지막 글 점수를 바꿈 (커서의 점수와 달라짐)
+        response = client.post(f"/likes/{ids[-1]}/like", headers=auth(VIEWER_ID))
+        assert response.status_code == 200, response.text
+
+    ids = walk_pages(client, limit=3, between=like_last)
+    assert sorted(ids) == list(range(1, 11))
+
+
+def test_decay_cursor_without_leaderboard_is_400(sync_engine, client, monkeypatch):
+    '''
+    감쇠 점수 커서는 DB 정렬(좋아요 수)과 비교할 수 없으므로 리더보드가 없으면 400
+    '''
+    monkeypatch.setattr(settings, "popular_decay_half_life_hours", 24.0)
+    seed_posts(sync_engine)
+    client.portal.call(rebuild_popular_leaderboard)
+    response = client.get("/recommendation/popular", params={"limit": 3})
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+
+    client.portal.call(redis_client.redis.delete, popular_leaderboard.ready_key)
+    response = client.get("/recommendation/popular", params={"limit": 3, "cursor": cursor})
+    assert response.status_code == 400
@@ -0,0 +1,32 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models import Post, User
+from app.redis_client import DIRTY_VIEWS_KEY, redis_client
+from app.scheduler import sync_views_to_db
+from app.security import create_access_token
+
+
+def test_delete_post_subtracts_views_from_author(sync_engine, client):
+    '''
+    글을 지우면 작성자의 total_views 에서 그 글의 조회수가 빠지고,
+    Redis 에 남아 있던 조회수도 나중에 동기화될 때 다시 더해지지 않아야 함
+    '''
+    with Session(sync_engine) as db:
+        db.add(User(id=1, username="u", email="u@x.com", total_views=30))
+        db.flush()
+        db.add_all([
+            Post(id=1, user_id=1, title="t1", content="c", views=10),
+            Post(id=2, user_id=1, title="t2", content="c", views=20),
+        ])
+        db.commit()
+    # 아직 DB 에 반영되지 않은 조회수
+    client.portal.call(redis_client.redis.set, "post:1:views", 5)
+    client.portal.call(redis_client.redis.sadd, DIRTY_VIEWS_KEY, 1)
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': '1'})}"}
+    response = client.delete("/posts/1", headers=headers)
+    assert response.status_code == 200, response.text
+
+    client.portal.call(sync_views_to_db)
+    with Session(sync_engine) as db:
+        assert db.scalar(select(User.total_views).where(User.id == 1)) == 20
@@ -0,0 +1,80 @@
+from sqlalchemy.orm import Session
+from app.database import SQL_STATEMENTS_HEADER
+from app.models import Book, Comment, Follow, Like, Post, PostTag, User
+from app.security import create_access_token
+
+AUTHOR_ID = 1
+READER_ID = 2
+FIRST_POST_ID = 1
+# 초기 마이그레이션이 넣는 태그 중 앞의 3개 (1: 소설)
+TAG_IDS = (1, 2, 3)
+TAG_NAME = "소설"
+
+
+def seed(engine, start: int, end: int):
+    '''
+    게시글 start~end 번 (태그 3개, 독자의 좋아요), 첫 게시글 댓글, 작성자 팔로워를 한 개씩 추가
+    '''
+    with Session(engine) as db:
+        if start == FIRST_POST_ID:
+            db.add_all([
+                User(id=AUTHOR_ID, username="author", email="author@x.com"),
+                User(id=READER_ID, username="reader", email="reader@x.com"),
+                Book(isbn="1234567890123", title="책", author="저자"),
+            ])
+            db.flush()
+        for post_id in range(start, end + 1):
+            follower_id = 100 + post_id
+            db.add_all([
+                Post(id=post_id, user_id=AUTHOR_ID, title=f"title {post_id}", content="content", isbn="1234567890123"),
+                User(id=follower_id, username=f"follower{post_id}", email=f"f{post_id}@x.com"),
+            ])
+            db.flush()
+            db.add_all([
+                *[PostTag(post_id=post_id, tag_id=tag_id) for tag_id in TAG_IDS],
+                Like(user_id=READER_ID, post_id=post_id),
+                Comment(post_id=FIRST_POST_ID, user_id=READER_ID, content=f"comment {post_id}"),
+                Follow(follower_id=follower_id, following_id=AUTHOR_ID),
+            ])
+        db.commit()
+
+
+# (이름, 경로, 로그인 필요 여부, 50개일 때 응답 개수)
+LIST_ENDPOINTS = [
+    ("posts/users", f"/posts/users/{AUTHOR_ID}", False, 50),
+    ("likes/user", "/likes/user?limit=50", True, 50),
+    ("comments", f"/posts/{FIRST_POST_ID}/comments", False, 50),
+    ("followers", f"/users/{AUTHOR_ID}/followers", False, 50),
+    ("search", "/search/?q=title", False, None),
+    ("search/tags", f"/search/?tags={TAG_NAME}", False, None),
+    ("popular", "/recommendation/popular?limit=50", False, 50),
+]
+
+
+def statement_counts(client) -> dict:
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(READER_ID)})}"}
+    counts = {}
+    for name, path, login, _ in LIST_ENDPOINTS:
+        # 첫 요청은 사용자/태그 캐시를 채우므로 두 번째 요청의 SQL 문 수를 비교
+        for _ in range(2):
+            response = client.get(path, headers=headers if login else {})
+            assert response.status_code == 200, (name, response.text)
+        counts[name] = (int(response.headers[SQL_STATEMENTS_HEADER]), response.json())
+    return counts
+
+
+def test_list_endpoints_query_count_is_constant(sync_engine, client):
+    '''
+    목록 API 의 SQL 문 수가 게시글/댓글 수에 따라 늘어나지 않아야 함 (N+1 회귀 테스트)
+    '''
+    seed(sync_engine, 1, 1)
+    single = statement_counts(client)
+    seed(sync_engine, 2, 50)
+    many = statement_counts(client)
+
+    for name, _, _, size in LIST_ENDPOINTS:
+        if size is not None:
+            body = many[name][1]
+            items = body["followers"] if isinstance(body, dict) else body
+            assert len(items) == size, name
+        assert many[name][0] == single[name][0], (name, single[name][0], many[name][0])
@@ -0,0 +1,105 @@
+import os
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.util import AutogenerateDiffsDetected
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import sqlite
+from app.models import Comment, Follow, Like, Post, PostTag
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic")
+
+
+def alembic_config(url: str) -> Config:
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+@pytest.fixture(scope="module")
+def migrated_db(tmp_path_factory):
+    '''
+    alembic 마이그레이션을 head 까지 적용한 sqlite 파일 DB
+    '''
+    url = f"sqlite:///{tmp_path_factory.mktemp('plans') / 'blog.db'}"
+    command.upgrade(alembic_config(url), "head")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+def query_plan(engine, statement) -> str:
+    sql = statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+# (라우터, 조회, 사용해야 하는 인덱스)
+HOT_QUERIES = [
+    (
+        "comments: 게시글 댓글 목록",
+        select(Comment).where(Comment.post_id == 1).order_by(Comment.created_at),
+        "ix_comments_post_id_created_at",
+    ),
+    (
+        "comments: 대댓글 찾기",
+        select(Comment.id).where(Comment.parent_id == 1),
+        "ix_comments_parent_id",
+    ),
+    (
+        "likes: 좋아요한 게시글",
+        select(Like).where(Like.user_id == 1).order_by(Like.created_at.desc(), Like.post_id.desc()).limit(20),
+        "ix_likes_user_id_created_at",
+    ),
+    (
+        "likes: 게시글의 좋아요 목록",
+        select(Like).where(Like.post_id == 1),
+        "ix_likes_post_id",
+    ),
+    (
+        "posts: 사용자별 게시글",
+        select(Post).where(Post.user_id == 1).order_by(Post.created_at.desc()),
+        "ix_posts_user_id_created_at",
+    ),
+    (
+        "recommendation: 인기 게시글",
+        select(Post).order_by(Post.like_count.desc(), Post.id.desc()).limit(10),
+        "ix_posts_like_count_id",
+    ),
+    (
+        "search: 기본 정렬",
+        select(Post).order_by(Post.created_at.desc(), Post.id.desc()).limit(10),
+        "ix_posts_created_at_id",
+    ),
+    (
+        "follows: 팔로워 목록",
+        select(Follow.follower_id).where(Follow.following_id == 1),
+        "ix_follows_following_id",
+    ),
+    (
+        "posts/recommendation: 태그로 게시글 찾기",
+        select(PostTag.post_id).where(PostTag.tag_id.in_([1, 2, 3])),
+        "ix_posttags_tag_id",
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "statement, index", [(q, i) for _, q, i in HOT_QUERIES], ids=[name for name, _, _ in HOT_QUERIES]
+)
+def test_hot_query_uses_index(migrated_db, statement, index):
+    plan = query_plan(migrated_db, statement)
+    assert index in plan, plan
+
+
+def test_models_match_migrations(migrated_db):
+    '''
+    마이그레이션 결과와 모델이 같아서 autogenerate 가 만들 변경이 없어야 함 (검색용 객체는 env.py 에서 제외)
+    '''
+    url = migrated_db.url.render_as_string(hide_password=False)
+    try:
+        command.check(alembic_config(url))
+    except AutogenerateDiffsDetected as e:
+        pytest.fail(str(e))
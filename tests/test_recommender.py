@@ -0,0 +1,32 @@
+import asyncio
+from app.models import Post, Tag, User, UserTagPreference
+from app.recommender import RecommendationCache
+
+
+def test_candidates_added_to_empty_list_expire(sqlite_db, fake_redis):
+    '''
+    후보가 없던 사용자 목록에 새 게시글이 추가되어도 목록 키가 만료되어야 함
+    '''
+    async def run():
+        async with sqlite_db() as db:
+            db.add_all([
+                User(id=1, username="author", email="a@x.com"),
+                User(id=2, username="reader", email="r@x.com"),
+                Tag(id=1, name="소설"),
+                UserTagPreference(user_id=2, tag_id=1, frequency=3),
+            ])
+            await db.commit()
+            cache = RecommendationCache(size=10, ttl=600)
+
+            await cache.refresh_user(db, 2)
+            ranking_key = cache.ranking(2).key
+            assert await fake_redis.exists(cache._ready_key(2))
+            assert not await fake_redis.exists(ranking_key)
+
+            db.add(Post(id=1, user_id=1, title="t", content="c"))
+            await db.commit()
+            await cache.add_post(db, 1, 1, [1])
+            assert await fake_redis.zcard(ranking_key) == 1
+            assert 0 < await fake_redis.ttl(ranking_key) <= 600
+
+    asyncio.run(run())
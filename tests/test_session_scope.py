@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionScope, async_engine
+from app.models import Book, Post, User
+from app.pool_metrics import pool_metrics
+from app.security import create_access_token
+from app.user_cache import user_cache
+
+USER_ID = 1
+
+
+class PoolUsage:
+    '''
+    요청 하나 동안의 커넥션 풀 체크아웃 수와 동시에 쓴 최대 커넥션 수
+    '''
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak = 0
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak = max(self.peak, self.in_use)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        self.in_use -= 1
+
+
+@pytest.fixture
+def pool_usage():
+    usage = PoolUsage()
+    event.listen(async_engine.sync_engine, "checkout", usage.on_checkout)
+    event.listen(async_engine.sync_engine, "checkin", usage.on_checkin)
+    yield usage
+    event.remove(async_engine.sync_engine, "checkout", usage.on_checkout)
+    event.remove(async_engine.sync_engine, "checkin", usage.on_checkin)
+
+
+def test_request_uses_one_connection_in_strict_mode(sync_engine, client, pool_usage, monkeypatch):
+    '''
+    사용자 조회(get_current_user)와 라우터가 한 요청 안에서 커넥션 하나만 씀
+    - 읽기 요청은 체크아웃 한 번, 커밋 뒤 다시 읽는 요청도 동시에는 하나만 사용
+    - strict 모드라 넘으면 RuntimeError 가 테스트 클라이언트까지 올라옴
+    '''
+    monkeypatch.setattr(settings, "db_session_scope_strict", True)
+    monkeypatch.setattr(settings, "db_max_connections_per_request", 1)
+    monkeypatch.setattr(settings, "like_write_behind", False)
+    with Session(sync_engine) as db:
+        db.add_all([User(id=USER_ID, username="u", email="u@x.com"), Book(isbn="1234567890123", title="책")])
+        db.flush()
+        db.add(Post(id=1, user_id=USER_ID, title="t", content="c", isbn="1234567890123", like_count=0))
+        db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(USER_ID)})}"}
+    pool_metrics.reset()
+
+    # (메서드, 경로, 요청 인자, 체크아웃 수) - 커밋 뒤 refresh 하는 요청은 차례로 두 번
+    requests = [
+        ("get", "/likes/user", {}, 1),
+        ("get", f"/user/{USER_ID}", {}, 1),
+        ("get", "/posts/1/related", {}, 1),
+        ("post", "/likes/1/like", {}, 1),
+        ("put", "/userinfo", {"json": {"bio": "hello"}}, 2),
+    ]
+    for method, path, kwargs, expected in requests:
+        # 캐시를 비워서 get_current_user 가 DB 에서 사용자를 읽도록
+        client.portal.call(user_cache.invalidate, USER_ID)
+        pool_usage.clear()
+        response = getattr(client, method)(path, headers=headers, **kwargs)
+        assert response.status_code == 200, (path, response.text)
+        assert pool_usage.peak == 1, (path, pool_usage.peak)
+        assert pool_usage.checkouts == expected, (path, pool_usage.checkouts)
+    assert pool_metrics.scope_violations == 0
+
+
+def test_strict_mode_raises_on_second_connection(monkeypatch):
+    monkeypatch.setattr(settings, "db_session_scope_strict", True)
+    monkeypatch.setattr(settings, "db_max_connections_per_request", 1)
+    pool_metrics.reset()
+    scope = SessionScope("GET /test")
+    scope.on_checkout()
+    scope.on_checkout()
+    with pytest.raises(RuntimeError):
+        scope.check()
+    assert pool_metrics.scope_violations == 1
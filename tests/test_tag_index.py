@@ -0,0 +1,149 @@
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import time
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from app.database import Base
+from app.models import Post as PostModel, PostTag
+from app.post_loader import select_posts
+from app.tag_index import TagIndex
+
+TAG_COUNT = 50
+
+
+def random_posts(count: int, seed: int = 7):
+    '''
+    (post_id, author_id, 태그 id 튜플) - 태그는 3~5개, 앞쪽 태그일수록 자주 붙음
+    '''
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(TAG_COUNT)]
+    posts = []
+    for post_id in range(1, count + 1):
+        tags = set()
+        while len(tags) < rng.randint(3, 5):
+            tags.add(rng.choices(range(1, TAG_COUNT + 1), weights)[0])
+        posts.append((post_id, rng.randint(1, max(count // 10, 1)), tuple(sorted(tags))))
+    return posts
+
+
+def test_related_matches_brute_force():
+    posts = random_posts(2000)
+    index = TagIndex()
+    for post_id, author_id, tags in posts:
+        index.add_post(post_id, author_id, tags)
+    tags_of = {post_id: set(tags) for post_id, _, tags in posts}
+    author_of = {post_id: author_id for post_id, author_id, _ in posts}
+
+    for post_id in (1, 500, 1999):
+        for metric in ("cosine", "jaccard"):
+            expected = []
+            for other, other_tags in tags_of.items():
+                inter = len(tags_of[post_id] & other_tags)
+                if other == post_id or not inter or author_of[other] == 3:
+                    continue
+                if metric == "jaccard":
+                    score = inter / len(tags_of[post_id] | other_tags)
+                else:
+                    score = inter / (len(tags_of[post_id]) * len(other_tags)) ** 0.5
+                expected.append((-round(score, 12), -other))
+            expected = [-other for _, other in sorted(expected)[:10]]
+            related = index.related(post_id, 10, exclude_user_id=3, metric=metric)
+            assert [other for other, _ in related] == expected
+
+
+def build_db(path: str, posts):
+    '''
+    posts 로 sqlite 파일 DB 를 만듦 (벤치마크용, sqlite3 로 바로 넣음)
+    '''
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    authors = {author_id for _, author_id, _ in posts}
+    conn.executemany(
+        "INSERT INTO users (id, username, email) VALUES (?, ?, ?)",
+        ((author_id, f"u{author_id}", f"u{author_id}@x.com") for author_id in authors),
+    )
+    conn.executemany(
+        "INSERT INTO tags (id, name) VALUES (?, ?)", ((i, f"t{i}") for i in range(1, TAG_COUNT + 1))
+    )
+    conn.executemany(
+        "INSERT INTO posts (id, user_id, title, content, tag_status) VALUES (?, ?, 't', 'c', 'done')",
+        ((post_id, author_id) for post_id, author_id, _ in posts),
+    )
+    conn.executemany(
+        "INSERT INTO posttags (post_id, tag_id) VALUES (?, ?)",
+        ((post_id, tag_id) for post_id, _, tags in posts for tag_id in tags),
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.95) - 1] * 1000
+
+
+# 관련 게시글: 메모리 인덱스 vs SQL (posts.get_any_posts 의 두 경로) 지연시간 비교
+#   TAG_INDEX_BENCHMARK=1 pytest tests/test_tag_index.py -k benchmark -s
+# 100만 개는 sqlite 파일을 만드는 데만 몇 분 걸림
+@pytest.mark.skipif(not os.environ.get("TAG_INDEX_BENCHMARK"), reason="TAG_INDEX_BENCHMARK 이 없으면 측정하지 않음")
+@pytest.mark.parametrize("count", [100_000, 1_000_000])
+def test_related_benchmark(tmp_path, count):
+    posts = random_posts(count)
+    path = str(tmp_path / "related.db")
+    build_db(path, posts)
+    rng = random.Random(count)
+    samples = [rng.randint(1, count) for _ in range(50)]
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        try:
+            async with AsyncSession(engine) as db:
+                index = TagIndex()
+                start = time.perf_counter()
+                await index.load(db)
+                load_seconds = time.perf_counter() - start
+                memory = sum(
+                    getattr(index, name).nbytes for name in ("_post_ids", "_authors", "_sizes", "_alive")
+                ) + sum(array.nbytes for array in map(index._posting, range(1, TAG_COUNT + 1)))
+
+                index_times, sql_times = [], []
+                for post_id in samples:
+                    # 인덱스 경로: 점수 계산 + 게시글 PK 조회
+                    start = time.perf_counter()
+                    related = index.related(post_id, 6)
+                    result = await db.execute(
+                        select_posts().where(PostModel.id.in_([other for other, _ in related]))
+                    )
+                    assert len(result.scalars().all()) == 6
+                    index_times.append(time.perf_counter() - start)
+
+                    # SQL 경로: 겹치는 태그 수로 GROUP BY
+                    start = time.perf_counter()
+                    result = await db.execute(
+                        select_posts(func.count(PostTag.tag_id))
+                        .join(PostTag)
+                        .where(PostTag.tag_id.in_(posts[post_id - 1][2]), PostModel.id != post_id)
+                        .group_by(PostModel.id)
+                        .order_by(func.count(PostTag.tag_id).desc())
+                        .limit(10)
+                    )
+                    assert len(result.all()) == 10
+                    sql_times.append(time.perf_counter() - start)
+                return load_seconds, memory, index_times, sql_times
+        finally:
+            await engine.dispose()
+
+    load_seconds, memory, index_times, sql_times = asyncio.run(run())
+    index_p50, index_p95 = percentiles(index_times)
+    sql_p50, sql_p95 = percentiles(sql_times)
+    print(
+        f"\nposts={count:>7} load={load_seconds:.1f}s memory={memory / 2**20:.1f}MiB "
+        f"index p50={index_p50:.2f}ms p95={index_p95:.2f}ms sql p50={sql_p50:.2f}ms p95={sql_p95:.2f}ms"
+    )
+    assert index_p50 < sql_p50
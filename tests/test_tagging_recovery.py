@@ -0,0 +1,69 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, update
+from app.models import Post, PostTag, Tag, User
+from app.tag_index import TagIndex
+from app.tagging import TAG_STATUS_DONE, TAG_STATUS_PENDING, TAGGING_QUEUE_KEY, tag_worker
+
+
+async def seed(db):
+    db.add(User(id=1, username="u", email="u@x.com", password_hash="x"))
+    db.add_all([Tag(id=i, name=f"t{i}") for i in (1, 2, 3)])
+    for post_id, status in ((1, TAG_STATUS_DONE), (2, TAG_STATUS_PENDING), (3, TAG_STATUS_DONE), (4, TAG_STATUS_DONE)):
+        db.add(Post(id=post_id, user_id=1, title="t", content="c", isbn="1", tag_status=status))
+    db.add_all([PostTag(post_id=post_id, tag_id=1) for post_id in (1, 3, 4)])
+    await db.commit()
+
+
+def test_pending_post_does_not_stall_index_refresh(sqlite_db):
+    async def run():
+        async with sqlite_db() as db:
+            await seed(db)
+            index = TagIndex()
+            await index.load(db)
+            assert (len(index), index.synced_post_id, index.pending_post_ids) == (3, 4, {2})
+
+            # 뒤의 게시글을 다시 읽지 않으므로 행이 늘지 않음
+            for _ in range(3):
+                await index.load_new(db)
+            assert (index._rows, index._dead) == (3, 0)
+
+            await db.execute(update(Post).where(Post.id == 2).values(tag_status=TAG_STATUS_DONE))
+            db.add(PostTag(post_id=2, tag_id=1))
+            db.add(Post(id=5, user_id=1, title="t", content="c", isbn="1", tag_status=TAG_STATUS_PENDING))
+            await db.commit()
+            await index.load_new(db)
+            assert (len(index), index.synced_post_id, index.pending_post_ids) == (4, 5, {5})
+            assert [post_id for post_id, _ in index.related(1, 10)] == [4, 3, 2]
+
+            # 태그를 기다리다 지워진 게시글은 더 이상 확인하지 않음
+            await db.execute(delete(Post).where(Post.id == 5))
+            await db.commit()
+            await index.load_new(db)
+            assert index.pending_post_ids == set()
+
+    asyncio.run(run())
+
+
+def test_requeue_stuck_pending_posts(sqlite_db, fake_redis):
+    async def run():
+        async with sqlite_db() as db:
+            await seed(db)
+            old = datetime.now() - timedelta(hours=1)
+            await db.execute(update(Post).values(created_at=old))
+            db.add(Post(id=5, user_id=1, title="t", content="c", isbn="1", tag_status=TAG_STATUS_PENDING))
+            db.add(Post(id=6, user_id=1, title="t", content="c", isbn="1", tag_status=TAG_STATUS_PENDING, created_at=old))
+            await db.commit()
+
+            # 6번은 재시도 대기 중이라 이미 큐에 있음
+            retry_at = time.time() + 300
+            await fake_redis.zadd(TAGGING_QUEUE_KEY, {"6": retry_at})
+
+            assert await tag_worker.requeue_stuck(db) == 1
+            queue = dict(await fake_redis.zrange(TAGGING_QUEUE_KEY, 0, -1, withscores=True))
+            # 오래된 pending(2)만 새로 등록, 방금 쓴 5번은 아직 기다림, 6번 실행 시각은 그대로
+            assert set(queue) == {"2", "6"} and queue["6"] == retry_at
+            assert await tag_worker.requeue_stuck(db) == 0
+
+    asyncio.run(run())
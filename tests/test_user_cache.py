@@ -0,0 +1,32 @@
+import asyncio
+from datetime import datetime
+from app.models import User
+from app.user_cache import UserCache
+
+
+def test_password_hash_is_not_cached(fake_redis):
+    user = User(id=1, username="u", email="u@x.com", password_hash="secret", bio="", total_views=0, created_at=datetime.now())
+    assert "password_hash" not in UserCache.to_dict(user)
+    # 이전 버전이 Redis 에 저장한 값에 있던 password_hash 도 쓰지 않음
+    legacy = {**UserCache.to_dict(user), "password_hash": "secret"}
+    assert "password_hash" not in UserCache.from_dict(legacy)
+
+
+def test_invalidate_clears_other_workers(fake_redis):
+    async def run():
+        worker_a = UserCache(maxsize=10, local_ttl=60, ttl=60)
+        worker_b = UserCache(maxsize=10, local_ttl=60, ttl=60)
+        worker_b.start()
+        await asyncio.sleep(0.05)
+        worker_b._set_local(1, {"id": 1})
+        worker_b._set_local(2, {"id": 2})
+
+        await worker_a.invalidate(1)
+        for _ in range(50):
+            if 1 not in worker_b._local:
+                break
+            await asyncio.sleep(0.01)
+        assert list(worker_b._local) == [2]
+        await worker_b.stop()
+
+    asyncio.run(run())
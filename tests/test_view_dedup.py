@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+import fakeredis.aioredis
+import pytest
+import redis.asyncio as redis
+from app.config import settings
+from app.redis_client import DIRTY_VIEWS_KEY, redis_client
+
+
+def record_views(client, backend: str, post_id: int, viewers: int, repeat: int = 1) -> int:
+    '''
+    서로 다른 IP viewers 명이 repeat 번씩 조회했을 때 올라간 조회수
+    '''
+    async def run():
+        redis_client.redis = client()
+        redis_client._scripts = {}
+        for _ in range(repeat):
+            for i in range(viewers):
+                await redis_client.record_view(post_id, f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}")
+        views = int(await redis_client.redis.get(f"post:{post_id}:views") or 0)
+        dirty = await redis_client.redis.sismember(DIRTY_VIEWS_KEY, str(post_id))
+        assert dirty or views == 0
+        return views
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def backend(monkeypatch, request):
+    monkeypatch.setattr(settings, "view_dedup_backend", request.param)
+    yield request.param
+    redis_client.redis = None
+    redis_client._scripts = {}
+
+
+@pytest.mark.parametrize("backend", ["key", "hll"], indirect=True)
+def test_duplicate_views_are_not_counted(backend):
+    fake = lambda: fakeredis.aioredis.FakeRedis(decode_responses=True)
+    assert record_views(fake, backend, 1, 300, repeat=3) == 300
+
+
+@pytest.mark.parametrize("backend", ["hll"], indirect=True)
+def test_hll_views_follow_cardinality(backend):
+    '''
+    조회수는 PFADD 반환값이 아니라 PFCOUNT 증가분의 합이라서 항상 카디널리티와 같음
+    '''
+    server = fakeredis.FakeServer()
+    fake = lambda: fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    views = record_views(fake, backend, 2, 2000)
+
+    async def cardinality():
+        client = fake()
+        keys = [key async for key in client.scan_iter(match="post:2:viewed:hll:*") if not key.endswith(":counted")]
+        return await client.pfcount(*keys)
+
+    assert views == asyncio.run(cardinality())
+
+
+# 실제 Redis 에서 메모리/정확도 측정 (fakeredis 의 HLL 은 정확한 집합이라 측정 불가)
+#   REDIS_URL=redis://localhost:6379/15 pytest tests/test_view_dedup.py -k benchmark -s
+# 측정에 쓴 DB 는 비움
+@pytest.mark.skipif(not os.environ.get("REDIS_URL"), reason="REDIS_URL 이 없으면 측정하지 않음")
+@pytest.mark.parametrize("backend", ["key", "hll"], indirect=True)
+@pytest.mark.parametrize("viewers", [1, 100, 10000, 50000, 200000])
+def test_view_dedup_benchmark(backend, viewers):
+    url = os.environ["REDIS_URL"]
+    real = lambda: redis.from_url(url, decode_responses=True)
+
+    async def reset():
+        await real().flushdb()
+
+    async def memory() -> int:
+        client = real()
+        total = 0
+        async for key in client.scan_iter(match="post:*:viewed:*", count=1000):
+            total += await client.memory_usage(key) or 0
+        return total
+
+    asyncio.run(reset())
+    start = time.perf_counter()
+    views = record_views(real, backend, 3, viewers)
+    elapsed = time.perf_counter() - start
+    used = asyncio.run(memory())
+    error = abs(views - viewers) / viewers
+    print(
+        f"\n{backend:>4} viewers={viewers:>6} counted={views:>6} error={error:.2%} "
+        f"memory={used:>9}B ({used / viewers:.1f}B/viewer) {elapsed / viewers * 1e6:.0f}us/view"
+    )
+    asyncio.run(reset())
+    if backend == "key":
+        assert views == viewers
+    else:
+        # 표준오차 0.81% 의 약 4배
+        assert error < 0.035